@@ -1,23 +1,26 @@
-import google.generativeai as genai
-import streamlit as st
 import pandas as pd
+from typing import Optional
 
+from ai.llm import DEFAULT_GEMINI_MODEL, TextModel, generate
+from ai.prompt_builder import build_prompt
+
+
+def get_gemini_model(model_name: str = DEFAULT_GEMINI_MODEL):
+    # imported here: the offline stub model runs without either package
+    import google.generativeai as genai
+    import streamlit as st
 
-def get_gemini_model():
     if "gemini" not in st.secrets or "api_key" not in st.secrets["gemini"]:
         raise RuntimeError("Gemini API key não encontrada nos secrets.")
 
     genai.configure(api_key=st.secrets["gemini"]["api_key"])
-    return genai.GenerativeModel("gemini-1.5-pro")
+    return genai.GenerativeModel(model_name)
 
 
-def analyze_market(df: pd.DataFrame) -> str:
-    model = get_gemini_model()
-
-    prompt = f"""
+PROMPT = """
 Você é um analista imobiliário sênior.
 
-Analise os dados abaixo e responda de forma objetiva:
+Analise o resumo estatístico abaixo (rollups por ZIP, distribuições e outliers) e responda de forma objetiva:
 
 1. Quais regiões estão subavaliadas?
 2. Onde existe maior potencial de valorização?
@@ -25,8 +28,11 @@ Analise os dados abaixo e responda de forma objetiva:
 4. O que um investidor deveria fazer agora?
 
 DADOS:
-{df.head(200).to_string(index=False)}
+{data}
 """
 
-    response = model.generate_content(prompt)
-    return response.text
+
+def analyze_market(df: pd.DataFrame, token_budget: Optional[int] = None, model: Optional[TextModel] = None) -> str:
+    # summary instead of raw rows; same data + prompt is answered from the cache
+    prompt, summary = build_prompt(PROMPT, df, token_budget)
+    return generate(prompt, summary.digest, model)
@@ -1,23 +1,15 @@
 import pandas as pd
-from typing import Dict
-import google.generativeai as genai
-import streamlit as st
+from typing import Optional
 
+from ai.llm import TextModel, generate
+from ai.prompt_builder import build_prompt
 
-def analyze_market(df: pd.DataFrame) -> str:
-    """
-    Recebe dados agregados e gera análise de mercado via Gemini.
-    """
-
-    genai.configure(api_key=st.secrets["gemini"]["api_key"])
-    model = genai.GenerativeModel("gemini-1.5-pro")
-
-    prompt = f"""
+PROMPT = """
     You are a senior real estate market analyst.
 
-    Analyze the following dataset and provide insights:
+    Analyze the following market summary (per-ZIP rollups, distributions, outliers) and provide insights:
 
-    {df.head(200).to_string(index=False)}
+{data}
 
     Answer with:
     1. Top undervalued areas
@@ -26,5 +18,12 @@ def analyze_market(df: pd.DataFrame) -> str:
     4. Warning signals (overpricing, long DOM)
     """
 
-    response = model.generate_content(prompt)
-    return response.text
+
+def analyze_market(df: pd.DataFrame, token_budget: Optional[int] = None, model: Optional[TextModel] = None) -> str:
+    """
+    Recebe os dados do silo e gera análise de mercado via Gemini.
+    O prompt leva um resumo estatístico dentro de token_budget (ai/prompt_builder),
+    e a resposta fica no cache (ai/llm) para os mesmos dados.
+    """
+    prompt, summary = build_prompt(PROMPT, df, token_budget)
+    return generate(prompt, summary.digest, model)
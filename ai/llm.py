@@ -0,0 +1,164 @@
+"""
+LLM backends + response cache — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Uma interface de modelo (name + generate(prompt) -> str): Gemini em
+  produção, stub local determinístico para rodar o pipeline offline
+- Escolha por AI_MODEL (gemini | stub) ou por register_model para outros
+- Cache persistente das respostas em disco: chave = hash do modelo, do
+  resumo dos dados e do prompt. O mesmo clique com os mesmos dados não
+  paga o modelo de novo (e sobrevive a um restart)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Protocol
+
+# AI_MODEL       backend registered below (default gemini)
+# AI_CACHE_DIR   response cache directory (default ~/.cache/market_lens/ai), "off" disables it
+DEFAULT_MODEL = "gemini"
+DEFAULT_GEMINI_MODEL = "gemini-1.5-pro"
+
+
+class TextModel(Protocol):
+    name: str
+
+    def generate(self, prompt: str) -> str: ...
+
+
+class GeminiModel:
+    def __init__(self, model_name: str = DEFAULT_GEMINI_MODEL):
+        self.name = model_name
+        self._model = None
+
+    def generate(self, prompt: str) -> str:
+        if self._model is None:
+            from ai.gemini_ai import get_gemini_model
+            self._model = get_gemini_model(self.name)
+        return self._model.generate_content(prompt).text
+
+
+class StubModel:
+    """
+    Offline stand-in: no network, same answer for the same prompt. `reply`
+    (text or prompt -> text) overrides the canned answer; `calls` keeps
+    every prompt it was sent.
+    """
+
+    def __init__(self, reply: Optional[str | Callable[[str], str]] = None, name: str = "stub"):
+        self.name = name
+        self.reply = reply
+        self.calls: List[str] = []
+
+    def generate(self, prompt: str) -> str:
+        self.calls.append(prompt)
+        if callable(self.reply):
+            return self.reply(prompt)
+        if self.reply is not None:
+            return self.reply
+        sections = [line[3:] for line in prompt.splitlines() if line.startswith("## ")]
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:12]
+        return f"[stub {digest}] {len(prompt)} chars; sections: {', '.join(sections) or 'none'}"
+
+
+_MODELS: Dict[str, Callable[[], TextModel]] = {"gemini": GeminiModel, "stub": StubModel}
+
+
+def register_model(name: str, factory: Callable[[], TextModel]) -> None:
+    _MODELS[name] = factory
+
+
+def get_model(name: Optional[str] = None) -> TextModel:
+    name = name or os.getenv("AI_MODEL", DEFAULT_MODEL)
+    if name not in _MODELS:
+        raise ValueError(f"Unknown AI model '{name}' (registered: {sorted(_MODELS)})")
+    return _MODELS[name]()
+
+
+# =========================================================
+# Response cache
+# =========================================================
+
+def cache_key(model_name: str, data_digest: str, prompt: str) -> str:
+    h = hashlib.sha256()
+    for part in (model_name, data_digest, prompt):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """One JSON file per response: <root>/<key[:2]>/<key>.json, written atomically."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            entry = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            entry = None
+        except (OSError, ValueError):
+            entry = None
+            with self._lock:
+                self._stats["errors"] += 1
+        with self._lock:
+            self._stats["hits" if entry else "misses"] += 1
+        return entry["response"] if entry else None
+
+    def put(self, key: str, response: str, **meta: Any) -> None:
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps({"response": response, "created_at": time.time(), **meta}), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            with self._lock:
+                self._stats["errors"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+_lock = threading.Lock()
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    global _cache
+    root = os.getenv("AI_CACHE_DIR") or str(Path.home() / ".cache" / "market_lens" / "ai")
+    if root.lower() == "off":
+        return None
+    with _lock:
+        if _cache is None or _cache.root != Path(root):
+            _cache = ResponseCache(root)
+        return _cache
+
+
+def generate(prompt: str, data_digest: str, model: Optional[TextModel] = None, use_cache: bool = True) -> str:
+    """model.generate(prompt), answered from the response cache when this exact call was made before."""
+    model = model or get_model()
+    cache = get_response_cache() if use_cache else None
+    key = cache_key(model.name, data_digest, prompt)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    response = model.generate(prompt)
+    if cache is not None:
+        cache.put(key, response, model=model.name, data_digest=data_digest)
+    return response
@@ -0,0 +1,251 @@
+"""
+Prompt builder — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Resumir um silo em estatísticas compactas para o modelo (em vez de
+  df.head(200)): visão geral, distribuições, rollups por ZIP e outliers
+- Respeitar um orçamento de tokens (estimado, ~4 caracteres por token):
+  seções em ordem de prioridade, ZIPs cortados pelo volume de linhas
+- Devolver o hash do resumo, que entra na chave do cache de respostas
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# AI_PROMPT_TOKENS   budget of a whole prompt, template included (default 1500)
+DEFAULT_TOKEN_BUDGET = 1500
+CHARS_PER_TOKEN = 4
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+OUTLIER_Z = 3.5  # robust z-score (median / MAD) from which a listing is an outlier
+MAX_OUTLIERS = 10
+OUTLIER_SHARE = 0.25  # of what is left after overview + distributions
+ZIP_OUTLIER_MIN_ZIPS = 5  # fewer ZIPs than this: no ZIP is called an outlier
+ZIP_OUTLIER_MIN_DEVIATION = 0.15  # and its median price_sqft must be this far (relative) from the overall one
+
+# summary field -> candidate columns (classified silo names first)
+_COLUMNS = {
+    "zip": ("zip", "zip_code"),
+    "status": ("status_group", "status"),
+    "list_price": ("list_price",),
+    "close_price": ("close_price",),
+    "sqft": ("heated_area", "sqft"),
+    "dom": ("cdom", "adom", "days_to_contract", "dom"),
+    "beds": ("beds",),
+    "year_built": ("year_built",),
+}
+_METRICS = ("list_price", "close_price", "price_sqft", "sqft", "dom", "beds", "year_built")
+
+
+@dataclass
+class MarketSummary:
+    text: str
+    tokens: int
+    digest: str  # sha256 of text: same data summarized the same way -> same digest
+    # what the budget cut, e.g. {"zip_rollups": "12 of 40 ZIPs"}
+    truncated: Dict[str, str] = field(default_factory=dict)
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _fmt(v) -> str:
+    if v is None or pd.isna(v):
+        return "-"
+    a = abs(v)
+    if a >= 1e6:
+        return f"{v / 1e6:.2f}M"
+    if a >= 1e4:
+        return f"{v / 1e3:.0f}k"
+    if a >= 100 or float(v).is_integer():
+        return f"{v:.0f}"
+    return f"{v:.2f}"
+
+
+# =========================================================
+# Canonical frame
+# =========================================================
+
+def _market_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """The summary fields found in df (any naming), numeric where they should be."""
+    names = {str(c).strip().lower().replace(" ", "_"): c for c in df.columns}
+    out = pd.DataFrame(index=df.index)
+    for key, candidates in _COLUMNS.items():
+        col = next((names[c] for c in candidates if c in names), None)
+        if col is None:
+            continue
+        if key in ("zip", "status"):
+            out[key] = df[col].astype("string").str.strip()
+        else:
+            out[key] = pd.to_numeric(df[col], errors="coerce")
+
+    # close price when the row closed, list price otherwise
+    price = out.get("close_price", pd.Series(np.nan, index=df.index))
+    if "list_price" in out:
+        price = price.fillna(out["list_price"])
+    if "sqft" in out:
+        out["price_sqft"] = (price / out["sqft"].where(out["sqft"] > 0)).round(2)
+    out["price"] = price
+    return out.reset_index(drop=True)
+
+
+def _robust_z(s: pd.Series) -> pd.Series:
+    med = s.median()
+    mad = (s - med).abs().median()
+    if not mad or pd.isna(mad):
+        return pd.Series(0.0, index=s.index)
+    return 0.6745 * (s - med) / mad
+
+
+# =========================================================
+# Sections (lines in priority order)
+# =========================================================
+
+def _overview(m: pd.DataFrame) -> List[str]:
+    lines = [f"rows: {len(m)}"]
+    if "zip" in m:
+        lines.append(f"zips: {m['zip'].nunique()}")
+    if "status" in m:
+        counts = m["status"].value_counts()
+        lines.append("status: " + ", ".join(f"{k} {v}" for k, v in counts.items()))
+    return ["## OVERVIEW"] + lines
+
+
+def _distributions(m: pd.DataFrame) -> List[str]:
+    lines = []
+    for key in _METRICS:
+        if key not in m:
+            continue
+        s = m[key].dropna()
+        if s.empty:
+            continue
+        q = s.quantile(QUANTILES)
+        lines.append(f"{key}: {','.join(_fmt(v) for v in q)} (n={len(s)})")
+    if not lines:
+        return []
+    return ["## DISTRIBUTIONS p10,p25,p50,p75,p90"] + lines
+
+
+def _zip_rollups(m: pd.DataFrame) -> Tuple[List[str], List[str]]:
+    """(header lines, one line per ZIP by row count desc)."""
+    if "zip" not in m:
+        return [], []
+    g = m.dropna(subset=["zip"]).groupby("zip", sort=False)
+    cols, table = ["n"], pd.DataFrame({"n": g.size()})
+    if "status" in m:
+        counts = pd.crosstab(m["zip"], m["status"])
+        cols += [str(c) for c in counts.columns]
+        table = table.join(counts.rename(columns=str)).fillna({c: 0 for c in cols})
+    for key in ("list_price", "close_price", "price_sqft", "dom"):
+        if key in m:
+            cols.append(f"med_{key}")
+            table[f"med_{key}"] = g[key].median()
+    table = table.sort_values("n", ascending=False)
+    rows = [",".join([str(z)] + [_fmt(v) for v in r]) for z, r in zip(table.index, table[cols].itertuples(index=False))]
+    return ["## ZIP ROLLUPS", ",".join(["zip"] + cols)], rows
+
+
+def _outliers(m: pd.DataFrame) -> Tuple[List[str], List[str]]:
+    lines = []
+    if "zip" in m and "price_sqft" in m:
+        by_zip = m.groupby("zip")["price_sqft"].median().dropna()
+        overall = m["price_sqft"].median()
+        if len(by_zip) >= ZIP_OUTLIER_MIN_ZIPS and overall:
+            z = _robust_z(by_zip)
+            for zp in z.abs().sort_values(ascending=False).index[:3]:
+                # a tight spread of ZIP medians makes small gaps score high z
+                if abs(z[zp]) >= 2 and abs(by_zip[zp] / overall - 1) >= ZIP_OUTLIER_MIN_DEVIATION:
+                    lines.append(f"zip {zp}: median price_sqft {_fmt(by_zip[zp])} ({by_zip[zp] / overall - 1:+.0%} vs all)")
+
+    keys = [k for k in ("price_sqft", "dom") if k in m]
+    flagged = []
+    for key in keys:
+        z = _robust_z(m[key].dropna())
+        for i in z[z.abs() >= OUTLIER_Z].index:
+            flagged.append((abs(z[i]), key, i))
+    seen = set()
+    for _, key, i in sorted(flagged, reverse=True):
+        if i in seen:
+            continue
+        seen.add(i)
+        r = m.loc[i]
+        side = "high" if r[key] > m[key].median() else "low"
+        fields = " ".join(f"{k}={r[k] if k in ('zip', 'status') else _fmt(r[k])}" for k in ("zip", "status", "price", "sqft", "price_sqft", "dom") if k in m)
+        lines.append(f"{side} {key}: {fields}")
+        if len(seen) >= MAX_OUTLIERS:
+            break
+    if not lines:
+        return [], []
+    return [f"## OUTLIERS (robust z >= {OUTLIER_Z})"], lines
+
+
+# =========================================================
+# Budgeted summary / prompt
+# =========================================================
+
+def _fit(lines: List[str], budget: int) -> int:
+    """How many of `lines` fit in `budget` tokens."""
+    used = 0
+    for n, line in enumerate(lines):
+        used += estimate_tokens(line + "\n")
+        if used > budget:
+            return n
+    return len(lines)
+
+
+def _fit_tokens(lines: List[str]) -> int:
+    return sum(estimate_tokens(line + "\n") for line in lines)
+
+
+def summarize_market(df: pd.DataFrame, token_budget: Optional[int] = None) -> MarketSummary:
+    budget = token_budget or int(os.getenv("AI_PROMPT_TOKENS", DEFAULT_TOKEN_BUDGET))
+    truncated: Dict[str, str] = {}
+    if df is None or df.empty:
+        lines = ["## OVERVIEW", "rows: 0"]
+    else:
+        m = _market_frame(df)
+        lines = []
+        for name, section in (("overview", _overview(m)), ("distributions", _distributions(m))):
+            n = _fit(section, budget - _fit_tokens(lines))
+            if n < len(section):
+                truncated[name] = f"{n} of {len(section)} lines"
+            lines += section[:n]
+
+        zip_head, zip_rows = _zip_rollups(m)
+        out_head, out_rows = _outliers(m)
+        left = budget - _fit_tokens(lines)
+        reserve = min(_fit_tokens(out_head + out_rows), int(left * OUTLIER_SHARE))
+
+        if zip_rows:
+            n = _fit(zip_rows, left - reserve - _fit_tokens(zip_head) - 8)  # 8: room for the "+N more" line
+            if n:
+                lines += zip_head + zip_rows[:n]
+            if n < len(zip_rows):
+                truncated["zip_rollups"] = f"{n} of {len(zip_rows)} ZIPs"
+                lines.append(f"(+{len(zip_rows) - n} smaller ZIPs omitted)")
+        if out_rows:
+            n = _fit(out_rows, budget - _fit_tokens(lines) - _fit_tokens(out_head))
+            if n:
+                lines += out_head + out_rows[:n]
+            if n < len(out_rows):
+                truncated["outliers"] = f"{n} of {len(out_rows)} lines"
+
+    text = "\n".join(lines)
+    return MarketSummary(text=text, tokens=estimate_tokens(text), digest=hashlib.sha256(text.encode()).hexdigest(), truncated=truncated)
+
+
+def build_prompt(template: str, df: pd.DataFrame, token_budget: Optional[int] = None) -> Tuple[str, MarketSummary]:
+    """
+    Fills the "{data}" placeholder of `template` with summarize_market(df);
+    the budget covers the whole prompt, template included.
+    """
+    budget = token_budget or int(os.getenv("AI_PROMPT_TOKENS", DEFAULT_TOKEN_BUDGET))
+    summary = summarize_market(df, max(budget - estimate_tokens(template.replace("{data}", "")), 1))
+    return template.replace("{data}", summary.text), summary
@@ -1,28 +1,91 @@
 import pandas as pd
 from sqlalchemy import text
-from backend.etl import get_engine
+from backend.db import get_engine
+from backend.core.rollups import SUBDIVISION_SQL
+from backend.core.snapshot_store import get_snapshot_store
+
+BASELINE_GROUPS = {"zip": "zip", "subdivision": SUBDIVISION_SQL}
 
 class MarketAnalyzer:
     def __init__(self):
         self.engine = get_engine()
 
-    def find_undervalued_deals(self, threshold=0.90):
-        """Encontra imóveis 10% ou mais abaixo da média de preço/sqft do bairro."""
-        query = "SELECT * FROM public.stg_mls_classified"
+    def find_undervalued_deals(self, import_id, threshold=0.90, asset_class=None, top_n=None, baseline="mean", by="zip"):
+        """
+        Encontra imóveis 10% ou mais abaixo da média de preço/sqft do bairro.
+
+        Escopo: um silo (import_id) e, opcionalmente, um asset_class.
+        baseline: "mean" | "median" de list_price / heated_area, por "zip" | "subdivision".
+        O deal_score é calculado no banco; só voltam os listings qualificados.
+        """
+        if baseline not in ("mean", "median"):
+            raise ValueError(f"Unknown baseline '{baseline}', expected 'mean' or 'median'")
+        if by not in BASELINE_GROUPS:
+            raise ValueError(f"Unknown baseline group '{by}', expected one of {sorted(BASELINE_GROUPS)}")
+
+        baseline_col = f"{'avg' if baseline == 'mean' else 'median'}_price_sqft_{by}"
+        store = get_snapshot_store()
+        if store is not None and store.has(import_id):
+            return self._find_undervalued_local(store.read(import_id, asset_class), threshold, top_n, baseline, by, baseline_col)
+
+        if baseline == "mean":
+            baseline_cte = ""
+            baseline_sql = "AVG(price_sqft) OVER (PARTITION BY baseline_key)"
+            baseline_join = ""
+        else:
+            # percentile_cont is not a window function: one grouped pass, joined back
+            baseline_cte = """,
+            b AS (
+                SELECT baseline_key, percentile_cont(0.5) WITHIN GROUP (ORDER BY price_sqft) AS baseline
+                FROM s GROUP BY baseline_key
+            )"""
+            baseline_sql = "b.baseline"
+            baseline_join = "JOIN b USING (baseline_key)"
+
+        query = f"""
+            WITH s AS (
+                SELECT c.*,
+                       {BASELINE_GROUPS[by]} AS baseline_key,
+                       CAST(list_price AS double precision) / NULLIF(heated_area, 0) AS price_sqft
+                FROM public.stg_mls_classified c
+                WHERE import_id = :id
+                  AND (CAST(:cls AS text) IS NULL OR asset_class = :cls)
+            ){baseline_cte},
+            scored AS (
+                SELECT s.*,
+                       {baseline_sql} AS {baseline_col},
+                       COUNT(price_sqft) OVER (PARTITION BY baseline_key) AS baseline_n
+                FROM s {baseline_join}
+                WHERE baseline_key IS NOT NULL
+            )
+            SELECT *, price_sqft / NULLIF({baseline_col}, 0) AS deal_score
+            FROM scored
+            WHERE status_group = 'listing'
+              AND price_sqft / NULLIF({baseline_col}, 0) <= :threshold
+            ORDER BY deal_score, ml_number
+        """
+        params = {"id": import_id, "cls": asset_class, "threshold": threshold}
+        if top_n:
+            query += " LIMIT :top_n"
+            params["top_n"] = int(top_n)
+
         with self.engine.connect() as conn:
-            df = pd.read_sql(query, conn)
-        
-        if df.empty: return pd.DataFrame()
+            deals = pd.read_sql(text(query), conn, params=params)
+        return deals.drop(columns=["baseline_key"])
 
-        # Calcula média por ZIP
-        df['price_sqft'] = df['list_price'] / df['heated_area']
-        zip_averages = df.groupby('zip')['price_sqft'].mean().reset_index()
-        zip_averages.columns = ['zip', 'avg_price_sqft_zip']
+    @staticmethod
+    def _find_undervalued_local(df, threshold, top_n, baseline, by, baseline_col):
+        """Same result as the SQL path, over a silo read from the local snapshot store."""
+        if df.empty: return pd.DataFrame()
+        key = df['zip'] if by == "zip" else df['subdivision_condo_name'].fillna(df['legal_subdivision_name'])
+        area = df['heated_area'].where(df['heated_area'] != 0)
+        df = df.assign(price_sqft=df['list_price'] / area)
 
-        # Cruza dados
-        df = df.merge(zip_averages, on='zip')
-        df['deal_score'] = df['price_sqft'] / df['avg_price_sqft_zip']
+        groups = df['price_sqft'].groupby(key)
+        df[baseline_col] = groups.transform(baseline)
+        df['baseline_n'] = groups.transform('count')
+        df['deal_score'] = df['price_sqft'] / df[baseline_col].where(df[baseline_col] != 0)
 
-        # Filtra apenas o que está em estoque (listings) e abaixo do preço
-        deals = df[(df['status_group'] == 'listing') & (df['deal_score'] <= threshold)]
-        return deals.sort_values('deal_score')
+        deals = df[key.notna() & (df['status_group'] == 'listing') & (df['deal_score'] <= threshold)]
+        deals = deals.astype({'baseline_n': 'int64'}).sort_values(['deal_score', 'ml_number'], kind='stable')
+        return (deals.head(int(top_n)) if top_n else deals).reset_index(drop=True)
@@ -0,0 +1,97 @@
+"""
+Compact silo frames — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Converter um silo carregado para dtypes compactos, coluna a coluna,
+  seguindo o layout do contrato (CLASSIFIED_FIELDS):
+    string  -> category (quando repetitiva)
+    numeric -> Int16/Int32/Int64 nullable (valores inteiros) ou float32 (medidas/razões)
+    date    -> datetime64
+- Relatório de memória por coluna (antes / depois) para planejar capacidade
+"""
+
+from __future__ import annotations
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from backend.core.mls_contract import CLASSIFIED_FIELDS
+
+# columns outside CLASSIFIED_FIELDS that the silo table also carries
+EXTRA_KINDS: Dict[str, str] = {
+    "import_id": "string",
+    "snapshot_date": "date",
+    "asset_class": "string",
+    "status_raw": "string",
+    "status_group": "string",
+    "closed_type": "string",
+    "file_sha256": "string",
+}
+COLUMN_KINDS: Dict[str, str] = {**EXTRA_KINDS, **{name: kind for name, _, kind in CLASSIFIED_FIELDS}}
+
+# measures / ratios where float32 precision is plenty (everything else stays lossless)
+FLOAT32_FIELDS = frozenset([
+    "heated_area", "lot_size_sqft", "total_acreage", "lp_sqft", "sp_sqft", "sp_lp",
+])
+
+# a string column becomes categorical when it has at most this share of distinct values
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _compact_string(s: pd.Series) -> pd.Series:
+    if len(s) and s.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(s):
+        return s.astype("category")
+    return s
+
+
+def _compact_numeric(name: str, s: pd.Series) -> pd.Series:
+    v = pd.to_numeric(s, errors="coerce").astype("float64")
+    present = v.dropna()
+    if name in FLOAT32_FIELDS:
+        return v.astype("float32")
+    if present.empty or not ((present == np.floor(present)) & (present.abs() < 2**53)).all():
+        return v
+    for dtype in ("Int16", "Int32", "Int64"):
+        info = np.iinfo(dtype.lower())
+        if present.min() >= info.min and present.max() <= info.max:
+            return v.astype(dtype)
+    return v
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Typed copy of a silo frame; unknown columns are left as they are."""
+    out = {}
+    for col in df.columns:
+        kind = COLUMN_KINDS.get(col)
+        s = df[col]
+        if kind == "string":
+            out[col] = _compact_string(s)
+        elif kind == "numeric":
+            out[col] = _compact_numeric(col, s)
+        elif kind == "date":
+            out[col] = pd.to_datetime(s, errors="coerce")
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_report(df: pd.DataFrame, compact: pd.DataFrame = None) -> pd.DataFrame:
+    """Per-column bytes and dtypes, before and after compact_frame."""
+    compact = compact_frame(df) if compact is None else compact
+    before = df.memory_usage(index=False, deep=True)
+    after = compact.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        "dtype": df.dtypes.astype(str),
+        "bytes": before,
+        "compact_dtype": compact.dtypes.astype(str),
+        "compact_bytes": after,
+    })
+    report["saved_pct"] = (100 * (1 - report["compact_bytes"] / report["bytes"].where(report["bytes"] > 0))).round(1)
+    total = pd.DataFrame(
+        {"dtype": "", "bytes": before.sum(), "compact_dtype": "", "compact_bytes": after.sum(),
+         "saved_pct": round(100 * (1 - after.sum() / before.sum()), 1) if before.sum() else 0.0},
+        index=["TOTAL"],
+    )
+    return pd.concat([report.sort_values("bytes", ascending=False), total])
@@ -0,0 +1,240 @@
+"""
+Comparable sales (comps) — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Índice de vizinhos mais próximos por silo, sobre vendas fechadas
+- Espaço de busca: features físicas normalizadas (beds, baths, área, ano),
+  dentro do mesmo ZIP (o silo não tem coordenadas)
+- Um imóvel nunca é comp de si mesmo (mesmo row_id / ml_number)
+- KD-tree do scipy quando instalado, busca exata em numpy caso contrário
+- Índice cacheado por (import_id, asset_class): silos são imutáveis, então
+  só um import novo gera um índice novo
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from backend.db import get_engine
+
+# feature -> weight (applied after z-scoring)
+FEATURE_WEIGHTS: Dict[str, float] = {
+    "beds": 1.0,
+    "baths": 1.0,
+    "heated_area": 2.0,
+    "year_built": 0.5,
+}
+_ALL = "*"  # silo-wide tree key
+
+COMPS_COLUMNS = [
+    "row_id", "ml_number", "address", "zip", "status_group", "beds", "full_baths", "half_baths",
+    "heated_area", "year_built", "list_price", "close_price", "close_date",
+]
+
+
+# =========================================================
+# Tree backends
+# =========================================================
+
+class _BruteForce:
+    """Exact k-NN in numpy; used when scipy is not installed."""
+
+    def __init__(self, X: np.ndarray):
+        self.X = X
+        self.sq = (X ** 2).sum(axis=1)
+
+    def query(self, Y: np.ndarray, k: int, block: int = 2048) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self.X))
+        dist = np.empty((len(Y), k))
+        idx = np.empty((len(Y), k), dtype=np.intp)
+        for start in range(0, len(Y), block):
+            y = Y[start:start + block]
+            d2 = np.maximum((y ** 2).sum(axis=1)[:, None] + self.sq[None, :] - 2.0 * y @ self.X.T, 0.0)
+            part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            rows = np.arange(len(y))[:, None]
+            order = np.argsort(d2[rows, part], axis=1)
+            idx[start:start + block] = part[rows, order]
+            dist[start:start + block] = np.sqrt(d2[rows, idx[start:start + block]])
+        return dist, idx
+
+
+def _make_tree(X: np.ndarray):
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return _BruteForce(X)
+
+    tree = cKDTree(X)
+
+    class _KD:
+        def query(self, Y, k):
+            k = min(k, tree.n)
+            dist, idx = tree.query(Y, k=k)
+            return dist.reshape(len(Y), k), idx.reshape(len(Y), k)
+
+    return _KD()
+
+
+# =========================================================
+# Index
+# =========================================================
+
+def _feature_frame(df: pd.DataFrame) -> pd.DataFrame:
+    f = pd.DataFrame(index=df.index)
+    f["beds"] = pd.to_numeric(df.get("beds"), errors="coerce")
+    f["baths"] = pd.to_numeric(df.get("full_baths"), errors="coerce") + 0.5 * pd.to_numeric(df.get("half_baths"), errors="coerce").fillna(0)
+    f["heated_area"] = pd.to_numeric(df.get("heated_area"), errors="coerce")
+    f["year_built"] = pd.to_numeric(df.get("year_built"), errors="coerce")
+    return f
+
+
+class CompsIndex:
+    """k-NN index over the closed sales of one silo."""
+
+    def __init__(self, df: pd.DataFrame):
+        closed = df[(df["status_group"] == "closed") & pd.to_numeric(df["close_price"], errors="coerce").notna()]
+        self.sales = closed.reset_index(drop=True)
+
+        features = _feature_frame(self.sales)
+        self.center = features.median()
+        self.scale = features.std().replace(0, np.nan).fillna(1.0)
+
+        # comps come from the subject's own ZIP
+        X = self._vectors(self.sales)
+        self._trees = {}
+        zips = self.sales["zip"].astype(str).to_numpy()
+        for z, pos in pd.Series(np.arange(len(X))).groupby(zips).groups.items():
+            pos = np.asarray(pos)
+            self._trees[z] = (_make_tree(X[pos]), pos)
+        if len(X):
+            self._trees[_ALL] = (_make_tree(X), np.arange(len(X)))
+
+    def __len__(self) -> int:
+        return len(self.sales)
+
+    def _vectors(self, df: pd.DataFrame) -> np.ndarray:
+        f = (_feature_frame(df).fillna(self.center) - self.center) / self.scale
+        cols = [f[c].to_numpy(dtype=float) * w for c, w in FEATURE_WEIGHTS.items()]
+        return np.column_stack(cols) if cols else np.empty((len(df), 0))
+
+    def query(self, subjects: pd.DataFrame, k: int = 5) -> pd.DataFrame:
+        """
+        k nearest closed sales for every subject row (batch), the subject
+        itself excluded. Returns one row per (subject, comp): subject_ml_number, rank, distance + comp columns.
+        """
+        comps = self._query(subjects, k)
+        return comps.drop(columns="_subject") if not comps.empty else comps
+
+    def _query(self, subjects: pd.DataFrame, k: int) -> pd.DataFrame:
+        if subjects.empty or not self._trees:
+            return pd.DataFrame()
+
+        Y = self._vectors(subjects)
+        zips = subjects["zip"].astype(str).tolist()
+        # ZIPs with fewer than k other sales borrow from the whole silo
+        keys = [z if z in self._trees and len(self._trees[z][1]) > k else _ALL for z in zips]
+
+        out: List[pd.DataFrame] = []
+        for key, pos in pd.Series(np.arange(len(subjects))).groupby(keys).groups.items():
+            tree, sale_pos = self._trees[key]
+            pos = np.asarray(pos)
+            # one extra neighbour: a closed subject finds itself at distance 0
+            dist, idx = tree.query(Y[pos], k + 1)
+            comps = self.sales.iloc[sale_pos[idx.ravel()]].reset_index(drop=True)
+            comps.insert(0, "distance", dist.ravel())
+            comps.insert(0, "subject_ml_number", np.repeat(subjects["ml_number"].to_numpy()[pos], idx.shape[1]))
+            comps.insert(0, "_subject", np.repeat(pos, idx.shape[1]))
+            out.append(comps)
+
+        comps = pd.concat(out, ignore_index=True)
+        is_self = comps["ml_number"].notna() & (comps["ml_number"] == comps["subject_ml_number"])
+        if "row_id" in subjects.columns:
+            subject_row = subjects["row_id"].to_numpy()[comps["_subject"].to_numpy()]
+            is_self |= comps["row_id"].notna() & (comps["row_id"].to_numpy() == subject_row)
+        comps = comps[~is_self].sort_values(["_subject", "distance"], kind="stable")
+        comps.insert(2, "rank", comps.groupby("_subject").cumcount() + 1)
+        return comps[comps["rank"] <= k].reset_index(drop=True)
+
+    def score(self, subjects: pd.DataFrame, k: int = 5) -> pd.DataFrame:
+        """Comp-based value estimate per subject: median comp $/sqft x subject heated_area."""
+        comps = self._query(subjects, k)
+        if comps.empty:
+            return pd.DataFrame()
+
+        comps["comp_price_sqft"] = comps["close_price"] / comps["heated_area"].where(comps["heated_area"] > 0)
+        agg = comps.groupby("_subject").agg(
+            comp_count=("ml_number", "size"),
+            comp_median_price=("close_price", "median"),
+            comp_median_price_sqft=("comp_price_sqft", "median"),
+            comp_mean_distance=("distance", "mean"),
+        )
+        scored = subjects.reset_index(drop=True).join(agg)
+        scored["comp_estimate"] = scored["comp_median_price_sqft"] * scored["heated_area"].where(scored["heated_area"] > 0)
+        scored["comp_ratio"] = scored["list_price"] / scored["comp_estimate"]
+        return scored
+
+
+# =========================================================
+# Engine (per-silo cached indexes)
+# =========================================================
+
+class CompsEngine:
+    MAX_INDEXES = 16
+
+    _lock = threading.Lock()
+    _indexes: "OrderedDict[Tuple[str, str], CompsIndex]" = OrderedDict()
+
+    def __init__(self):
+        self.engine = get_engine()
+
+    def _load(self, import_id: str, asset_class: Optional[str]) -> pd.DataFrame:
+        query = text(f"""
+            SELECT {', '.join(COMPS_COLUMNS)} FROM public.stg_mls_classified
+            WHERE import_id = :id AND (CAST(:cls AS text) IS NULL OR asset_class = :cls)
+        """)
+        with self.engine.connect() as conn:
+            return pd.read_sql(query, conn, params={"id": import_id, "cls": asset_class})
+
+    def index(self, import_id: str, asset_class: Optional[str] = None, df: Optional[pd.DataFrame] = None) -> CompsIndex:
+        """Cached index of the silo; `df` (the silo as _load returns it) saves the query on a miss."""
+        key = (str(import_id), str(asset_class or "*"))
+        with self._lock:
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return self._indexes[key]
+
+        built = CompsIndex(self._load(import_id, asset_class) if df is None else df)
+        with self._lock:
+            self._indexes[key] = built
+            while len(self._indexes) > self.MAX_INDEXES:
+                self._indexes.popitem(last=False)
+        return built
+
+    def comps_for(self, import_id: str, ml_number: str, asset_class: Optional[str] = None, k: int = 5) -> pd.DataFrame:
+        index = self.index(import_id, asset_class)
+        query = text(f"""
+            SELECT {', '.join(COMPS_COLUMNS)} FROM public.stg_mls_classified
+            WHERE import_id = :id AND ml_number = :ml
+              AND (CAST(:cls AS text) IS NULL OR asset_class = :cls)
+        """)
+        with self.engine.connect() as conn:
+            subject = pd.read_sql(query, conn, params={"id": import_id, "ml": ml_number, "cls": asset_class}).head(1)
+        return index.query(subject, k)
+
+    def score_silo(self, import_id: str, asset_class: Optional[str] = None, k: int = 5, status_group: str = "listing") -> pd.DataFrame:
+        """Batch comp scoring for every `status_group` row of the silo."""
+        df = self._load(import_id, asset_class)
+        index = self.index(import_id, asset_class, df)
+        return index.score(df[df["status_group"] == status_group].reset_index(drop=True), k)
+
+    @classmethod
+    def invalidate(cls, import_id: str) -> None:
+        with cls._lock:
+            for key in [k for k in cls._indexes if k[0] == str(import_id)]:
+                del cls._indexes[key]
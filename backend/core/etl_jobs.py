@@ -0,0 +1,302 @@
+"""
+ETL jobs — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Rodar run_batch_etl em segundo plano (threads locais do processo), fora
+  do script do Streamlit: a sessão que enviou o lote continua livre
+- Registrar cada lote em public.etl_jobs: status, import_id e progresso
+  por arquivo (linhas lidas / inseridas), que a UI consulta periodicamente
+- Vários uploads rodam ao mesmo tempo (ETL_JOB_WORKERS), cada um no seu silo
+- Um lote que falhou guarda os arquivos em memória e pode ser retomado do
+  último chunk commitado (resume_import_id de run_batch_etl); só os
+  últimos FAILED_JOBS_KEPT, por FAILED_JOB_TTL, ou até serem dispensados
+- Cada job guarda o dono (host + pid) e um heartbeat: só jobs com heartbeat
+  velho, ou cujo processo dono (neste host) morreu, são marcados failed.
+  Outras réplicas / workers continuam donos dos seus jobs
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, text
+
+from backend.core.etl_metrics import log_event
+from backend.db import get_engine
+
+# ETL_JOB_WORKERS   batches running at the same time (default 2)
+DEFAULT_JOB_WORKERS = 2
+PROGRESS_INTERVAL = 1.0  # seconds between progress writes of one job
+# uploads of failed jobs are held in memory for resume: newest few, for a while
+FAILED_JOBS_KEPT = 4
+FAILED_JOB_TTL = 3600.0  # seconds
+# queued / running jobs of this process get heartbeat_at refreshed this often;
+# another process may fail them once it is HEARTBEAT_STALE old
+HEARTBEAT_INTERVAL = 15.0  # seconds
+HEARTBEAT_STALE = 120.0  # seconds
+
+_JOB_COLUMNS = "job_id, report_name, status, import_id, files, rows_parsed, rows_inserted, error, created_at, started_at, finished_at"
+
+
+class _Upload:
+    """Detached copy of an uploaded file: the job outlives the Streamlit rerun that sent it."""
+
+    def __init__(self, f):
+        self.name = f.name
+        self._data = bytes(f.getbuffer())
+
+    def getbuffer(self):
+        return memoryview(self._data)
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # os.kill(pid, 0) would terminate it; the heartbeat decides
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _naive(ts) -> Optional[datetime]:
+    """DB timestamp (datetime, or text on SQLite) as a naive datetime in the session's clock."""
+    if ts is None:
+        return None
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    return ts.replace(tzinfo=None)
+
+
+def _decode(row) -> Dict[str, Any]:
+    job = dict(row._mapping)
+    job["job_id"] = str(job["job_id"])
+    job["import_id"] = str(job["import_id"]) if job["import_id"] else None
+    if isinstance(job["files"], str):
+        job["files"] = json.loads(job["files"])
+    return job
+
+
+class EtlJobRunner:
+    def __init__(self, workers: int = DEFAULT_JOB_WORKERS):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="etl-job")
+        self._lock = threading.Lock()
+        self._live: Dict[str, Dict[str, Any]] = {}
+        # job_id -> (failed_at, uploads + arguments), kept for resume (bounded, see _keep_failed)
+        self._failed: "OrderedDict[str, tuple]" = OrderedDict()
+        self.host, self.pid = socket.gethostname(), os.getpid()
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._beat, name="etl-job-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    # --- public API ---
+    def submit(self, files_data: List[Dict[str, Any]], report_name: str, snapshot_date, **etl_kwargs) -> str:
+        """Queues a batch (same files_data as run_batch_etl) and returns its job_id right away."""
+        job_id = str(uuid.uuid4())
+        files_data = [dict(item, file=_Upload(item['file'])) for item in files_data]
+        files = [
+            {"file": item['file'].name, "type": item['type'], "status": "queued", "rows_parsed": 0, "rows_inserted": 0}
+            for item in files_data
+        ]
+        with get_engine().begin() as conn:
+            conn.execute(text("""
+                INSERT INTO public.etl_jobs (job_id, report_name, snapshot_date, status, files, rows_parsed, rows_inserted, owner_host, owner_pid, heartbeat_at)
+                VALUES (:id, :name, :d, 'queued', :files, 0, 0, :host, :pid, CURRENT_TIMESTAMP)
+            """), {"id": job_id, "name": report_name, "d": snapshot_date, "files": json.dumps(files), "host": self.host, "pid": self.pid})
+
+        with self._lock:
+            self._live[job_id] = {"job_id": job_id, "status": "queued", "import_id": None, "files": files, "saved_at": 0.0}
+        self._pool.submit(self._run, job_id, files_data, report_name, snapshot_date, etl_kwargs)
+        return job_id
+
+    def can_resume(self, job_id: str) -> bool:
+        """Only this process still holds the uploads of its failed jobs (the last few, for FAILED_JOB_TTL)."""
+        with self._lock:
+            self._expire_failed()
+            return job_id in self._failed
+
+    def dismiss(self, job_id: str) -> None:
+        """Drops the uploads kept for resuming a failed job."""
+        with self._lock:
+            self._failed.pop(job_id, None)
+
+    def resume(self, job_id: str) -> None:
+        """Re-queues a failed job on the same silo; committed chunks are not loaded again."""
+        job = self.get(job_id)
+        with self._lock:
+            self._expire_failed()
+            if job_id not in self._failed:
+                raise ValueError(f"Job '{job_id}' can no longer be resumed, upload the files again")
+            _, (files_data, report_name, snapshot_date, etl_kwargs) = self._failed.pop(job_id)
+            files = [dict(f, status="queued") if f["status"] == "loading" else f for f in job["files"]]
+            self._live[job_id] = {"job_id": job_id, "status": "queued", "import_id": job["import_id"], "files": files, "saved_at": 0.0}
+        self._update(job_id, status="queued")
+        etl_kwargs = dict(etl_kwargs, resume_import_id=job["import_id"])
+        self._pool.submit(self._run, job_id, files_data, report_name, snapshot_date, etl_kwargs)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with get_engine().connect() as conn:
+            row = conn.execute(text(f"SELECT {_JOB_COLUMNS} FROM public.etl_jobs WHERE job_id = :id"), {"id": job_id}).fetchone()
+        return _decode(row) if row else None
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent jobs of every session (the table, not this process, is the source of truth)."""
+        with get_engine().connect() as conn:
+            rows = conn.execute(text(f"SELECT {_JOB_COLUMNS} FROM public.etl_jobs ORDER BY created_at DESC LIMIT :n"), {"n": limit}).fetchall()
+        return [_decode(r) for r in rows]
+
+    def recover_stale(self) -> int:
+        """
+        Marks queued / running jobs nobody is running any more as failed, and
+        their silos too: the heartbeat is older than HEARTBEAT_STALE, or the
+        owner is a dead process on this host. Jobs of live processes (other
+        replicas, an earlier runner of this process) are left alone.
+        """
+        with get_engine().connect() as conn:
+            now = _naive(conn.execute(text("SELECT CURRENT_TIMESTAMP")).scalar())
+            rows = conn.execute(text("""
+                SELECT job_id, owner_host, owner_pid, COALESCE(heartbeat_at, started_at, created_at) AS beat
+                FROM public.etl_jobs WHERE status IN ('queued', 'running')
+            """)).fetchall()
+
+        stale = []
+        for r in rows:
+            beat = _naive(r.beat)
+            dead = r.owner_host == self.host and r.owner_pid is not None and not _pid_alive(r.owner_pid)
+            if dead or beat is None or now - beat > timedelta(seconds=HEARTBEAT_STALE):
+                stale.append(str(r.job_id))
+        if not stale:
+            return 0
+
+        ids = {"ids": stale}
+        with get_engine().begin() as conn:
+            conn.execute(text("""
+                UPDATE public.stg_mls_imports SET status = 'failed'
+                WHERE status = 'loading' AND import_id IN (
+                    SELECT import_id FROM public.etl_jobs WHERE job_id IN :ids AND import_id IS NOT NULL
+                )
+            """).bindparams(bindparam("ids", expanding=True)), ids)
+            res = conn.execute(text("""
+                UPDATE public.etl_jobs
+                SET status = 'failed', error = 'Interrupted (its server stopped), upload the files again', finished_at = CURRENT_TIMESTAMP
+                WHERE job_id IN :ids AND status IN ('queued', 'running')
+            """).bindparams(bindparam("ids", expanding=True)), ids)
+        return res.rowcount
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stop.set()
+        self._pool.shutdown(wait=wait)
+
+    # --- internals ---
+    def _run(self, job_id, files_data, report_name, snapshot_date, etl_kwargs) -> None:
+        from backend.etl import run_batch_etl
+
+        try:
+            self._update(job_id, status="running", started_at=True)
+            try:
+                res = run_batch_etl(files_data, report_name, snapshot_date, progress=lambda i, **f: self._progress(job_id, i, **f), **etl_kwargs)
+            except Exception as e:
+                res = {"ok": False, "error": str(e)}
+            if not res["ok"] and (res.get("import_id") or etl_kwargs.get("resume_import_id")):
+                with self._lock:
+                    self._live[job_id]["import_id"] = res.get("import_id") or etl_kwargs["resume_import_id"]
+                    self._keep_failed(job_id, (files_data, report_name, snapshot_date, etl_kwargs))
+            self._update(job_id, status="succeeded" if res["ok"] else "failed", error=res.get("error"), finished_at=True)
+        finally:
+            with self._lock:
+                self._live.pop(job_id, None)
+
+    def _beat(self) -> None:
+        """Heartbeat of this process's queued / running jobs; also fails jobs other processes left behind."""
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            with self._lock:
+                ids = list(self._live)
+            try:
+                if ids:
+                    with get_engine().begin() as conn:
+                        conn.execute(text("UPDATE public.etl_jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE job_id IN :ids")
+                                     .bindparams(bindparam("ids", expanding=True)), {"ids": ids})
+                self.recover_stale()
+            except Exception as e:  # a DB hiccup must not end the heartbeat
+                log_event("etl_job_heartbeat_error", error=str(e))
+
+    def _expire_failed(self) -> None:
+        # caller holds self._lock
+        now = time.monotonic()
+        while self._failed and now - next(iter(self._failed.values()))[0] > FAILED_JOB_TTL:
+            self._failed.popitem(last=False)
+
+    def _keep_failed(self, job_id: str, args: tuple) -> None:
+        # caller holds self._lock
+        self._failed[job_id] = (time.monotonic(), args)
+        self._failed.move_to_end(job_id)
+        self._expire_failed()
+        while len(self._failed) > FAILED_JOBS_KEPT:
+            self._failed.popitem(last=False)
+
+    def _progress(self, job_id: str, i: Optional[int], **fields) -> None:
+        with self._lock:
+            live = self._live[job_id]
+            if i is None:
+                live.update(fields)
+            else:
+                live["files"][i].update(fields)
+            due = fields.get("status") != "loading" or time.monotonic() - live["saved_at"] >= PROGRESS_INTERVAL
+        if due:
+            self._update(job_id)
+
+    def _update(self, job_id: str, status: Optional[str] = None, error: Optional[str] = None,
+                started_at: bool = False, finished_at: bool = False) -> None:
+        with self._lock:
+            live = self._live[job_id]
+            if status:
+                live["status"] = status
+            live["saved_at"] = time.monotonic()
+            files = [dict(f) for f in live["files"]]
+            params = {
+                "id": job_id, "status": live["status"], "import_id": live["import_id"], "error": error,
+                "files": json.dumps(files),
+                "parsed": sum(f["rows_parsed"] for f in files),
+                "inserted": sum(f["rows_inserted"] for f in files),
+                "host": self.host, "pid": self.pid,
+            }
+        stamps = "".join([", started_at = CURRENT_TIMESTAMP" if started_at else "", ", finished_at = CURRENT_TIMESTAMP" if finished_at else ""])
+        # a resumed job starts over: the failure it came from is no longer its error
+        error_sql = ":error" if status in ("running", "succeeded") else "COALESCE(:error, error)"
+        with get_engine().begin() as conn:
+            conn.execute(text(f"""
+                UPDATE public.etl_jobs
+                SET status = :status, import_id = :import_id, files = :files, rows_parsed = :parsed,
+                    rows_inserted = :inserted, error = {error_sql}, owner_host = :host, owner_pid = :pid,
+                    heartbeat_at = CURRENT_TIMESTAMP{stamps}
+                WHERE job_id = :id
+            """), params)
+
+
+# =========================================================
+# Process-wide instance
+# =========================================================
+
+_lock = threading.Lock()
+_runner: Optional[EtlJobRunner] = None
+
+
+def get_job_runner() -> EtlJobRunner:
+    global _runner
+    with _lock:
+        if _runner is None:
+            _runner = EtlJobRunner(int(os.getenv("ETL_JOB_WORKERS", DEFAULT_JOB_WORKERS)))
+            _runner.recover_stale()
+        return _runner
@@ -0,0 +1,159 @@
+"""
+ETL stage metrics — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Medir cada estágio do ETL por arquivo: tempo de parede, linhas, rows/sec
+  e pico de memória
+- Estágios aninhados são exclusivos: o tempo de "read" não entra em
+  "classify" mesmo quando o classificador puxa os chunks do leitor
+- Memória: peak_mb é o pico do tracemalloc no estágio quando ligado
+  (ETL_TRACE_MEMORY=1, tem custo; um lote por vez, ver _trace_lock);
+  rss_hwm_mb é sempre o high-water mark de RSS do PROCESSO inteiro (desde
+  que ele subiu), não um pico do estágio
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger("market_lens.etl")
+
+# tracemalloc is process-global: one StageMetrics traces at a time, the
+# others (concurrent jobs) run untraced instead of resetting / stopping it
+_trace_lock = threading.Lock()
+
+
+def _rss_hwm_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if platform.system() == "Darwin" else 1 << 10), 1)
+
+
+def trace_memory_enabled() -> bool:
+    return os.getenv("ETL_TRACE_MEMORY", "").lower() in ("1", "true", "yes")
+
+
+class StageMetrics:
+    def __init__(self, trace_memory: Optional[bool] = None):
+        self.trace_memory = trace_memory_enabled() if trace_memory is None else trace_memory
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._stack: List[List[float]] = []  # [start, child_seconds, child_peak_bytes]
+        self._tracing = False  # holds _trace_lock (outermost stage only)
+        self._own_trace = False  # started tracemalloc itself
+
+    def _entry(self, name: str) -> Dict[str, Any]:
+        return self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "rows": 0, "peak_mb": None, "rss_hwm_mb": None})
+
+    def _start_trace(self) -> None:
+        if not self.trace_memory or not _trace_lock.acquire(blocking=False):
+            return  # another job is tracing: this one reports no peak_mb
+        self._tracing = True
+        self._own_trace = not tracemalloc.is_tracing()
+        if self._own_trace:
+            tracemalloc.start()
+
+    def _stop_trace(self) -> None:
+        if self._own_trace:
+            tracemalloc.stop()
+        self._tracing = self._own_trace = False
+        _trace_lock.release()
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0):
+        entry = self._entry(name)
+        if not self._stack:
+            self._start_trace()
+        if self._tracing:
+            # the enclosing stage keeps the peak reached before this one resets it
+            if self._stack:
+                self._stack[-1][2] = max(self._stack[-1][2], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        frame = [time.perf_counter(), 0.0, 0]
+        self._stack.append(frame)
+        try:
+            yield entry
+        finally:
+            elapsed = time.perf_counter() - frame[0]
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] += elapsed
+            entry["seconds"] += elapsed - frame[1]
+            entry["calls"] += 1
+            entry["rows"] += rows
+
+            if self._tracing:
+                peak = max(frame[2], tracemalloc.get_traced_memory()[1])
+                entry["peak_mb"] = max(entry["peak_mb"] or 0.0, round(peak / (1 << 20), 1))
+                if self._stack:
+                    self._stack[-1][2] = max(self._stack[-1][2], peak)
+                else:
+                    self._stop_trace()
+            hwm = _rss_hwm_mb()
+            if hwm is not None:
+                entry["rss_hwm_mb"] = max(entry["rss_hwm_mb"] or 0.0, hwm)
+
+    def add_rows(self, name: str, rows: int) -> None:
+        self._entry(name)["rows"] += rows
+
+    def timed_iter(self, name: str, chunks: Iterable[Any]) -> Iterator[Any]:
+        """Times every next() of `chunks` as `name` and counts the rows it yields."""
+        it = iter(chunks)
+        while True:
+            with self.stage(name) as entry:
+                try:
+                    chunk = next(it)
+                except StopIteration:
+                    entry["calls"] -= 1
+                    return
+                entry["rows"] += len(chunk)
+            yield chunk
+
+    def merge(self, other: Dict[str, Dict[str, Any]]) -> None:
+        """Adds the as_dict() of another run (e.g. a process-pool worker)."""
+        for name, s in other.items():
+            entry = self._entry(name)
+            entry["seconds"] += s["seconds"]
+            entry["calls"] += s.get("calls", 0)
+            entry["rows"] += s["rows"]
+            for key in ("peak_mb", "rss_hwm_mb"):
+                if s.get(key) is not None:
+                    entry[key] = max(entry[key] or 0.0, s[key])
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for name, s in self.stages.items():
+            out[name] = {
+                "seconds": round(s["seconds"], 4),
+                "calls": s["calls"],
+                "rows": s["rows"],
+                "rows_per_sec": round(s["rows"] / s["seconds"]) if s["rows"] and s["seconds"] > 0 else None,
+                "peak_mb": s["peak_mb"],
+                "rss_hwm_mb": s["rss_hwm_mb"],  # process-wide
+            }
+        return out
+
+
+def summarize(files: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Batch totals per stage + the slowest stages, from the per-file "stages" dicts."""
+    totals = StageMetrics(trace_memory=False)
+    for f in files:
+        totals.merge((f or {}).get("stages", {}))
+    stages = totals.as_dict()
+    slowest = sorted(stages, key=lambda n: stages[n]["seconds"], reverse=True)
+    return {"stages": stages, "slowest": slowest[:3], "seconds": round(sum(s["seconds"] for s in stages.values()), 4)}
+
+
+def log_event(event: str, **fields: Any) -> None:
+    logger.info(json.dumps({"event": event, **fields}, default=str))
@@ -4,36 +4,17 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 
+from backend.core.mls_columnar import classify_frame
+from backend.core.mls_contract import as_compiled
 from backend.core.normalization import clean_string, to_numeric, to_date
 
 
 def infer_asset_class(columns: List[str], contract: dict) -> str:
-    cols = set(columns)
-
-    if set(contract["signatures"]["rental_if_has_any"]).intersection(cols):
-        return "rental"
-
-    if set(contract["signatures"]["land_if_has_any"]).intersection(cols):
-        return "land"
-
-    return "residential_sale"
+    return as_compiled(contract).infer_asset_class(columns)
 
 
 def map_status(asset_class: str, status_raw: str, contract: dict):
-    status_raw = clean_string(status_raw)
-    if not status_raw:
-        raise ValueError("Status is missing")
-
-    rules = contract["status_rules"][asset_class]
-    mapped = rules.get(status_raw)
-
-    if not mapped:
-        raise ValueError(f"Unmapped status '{status_raw}' for asset_class '{asset_class}'")
-
-    if mapped.startswith("closed:"):
-        return "closed", mapped.split(":")[1]
-
-    return mapped, None
+    return as_compiled(contract).map_status(asset_class, clean_string(status_raw))
 
 
 def normalize_price(asset_class, status_raw, current_price):
@@ -54,9 +35,22 @@ def classify_dataframe(
     contract: dict,
     snapshot_date: Optional[date] = None,
 ) -> pd.DataFrame:
+    df.columns = [clean_string(c) for c in df.columns]
+    contract = as_compiled(contract)
+    asset_class = infer_asset_class(df.columns.tolist(), contract)
+    return classify_frame(df, contract, asset_class, snapshot_date)
+
+
+def classify_dataframe_rowwise(
+    df: pd.DataFrame,
+    contract: dict,
+    snapshot_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """Reference row-by-row classifier (used to validate/benchmark classify_frame)."""
     snapshot_date = snapshot_date or date.today()
     df.columns = [clean_string(c) for c in df.columns]
 
+    contract = as_compiled(contract)  # once, not per row in map_status
     asset_class = infer_asset_class(df.columns.tolist(), contract)
     rows: List[Dict[str, Any]] = []
 
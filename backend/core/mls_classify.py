@@ -12,25 +12,22 @@ from __future__ import annotations
 
 from datetime import date
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
 import pandas as pd
-import yaml
 
-from backend.core.normalization import clean_string, to_numeric, to_date
+from backend.core.mls_columnar import classify_frame
+from backend.core.mls_contract import CompiledContract, as_compiled, get_contract
+from backend.core.normalization import clean_string, to_numeric
 
 
 # =========================================================
 # Contract loading
 # =========================================================
 
-def load_contract(contract_path: str | Path) -> dict:
-    path = Path(contract_path)
-    if not path.exists():
-        raise FileNotFoundError(f"Contract not found: {path}")
-
-    with path.open("r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+def load_contract(contract_path: str | Path) -> CompiledContract:
+    """Compiled contract, parsed once per process (see backend.core.mls_contract)."""
+    return get_contract(contract_path)
 
 
 # =========================================================
@@ -38,18 +35,7 @@ def load_contract(contract_path: str | Path) -> dict:
 # =========================================================
 
 def infer_asset_class(columns: List[str], contract: dict) -> str:
-    cols = set(columns)
-
-    rental_sig = set(contract["signatures"]["rental_if_has_any"])
-    land_sig = set(contract["signatures"]["land_if_has_any"])
-
-    if rental_sig.intersection(cols):
-        return "rental"
-
-    if land_sig.intersection(cols):
-        return "land"
-
-    return "residential_sale"
+    return as_compiled(contract).infer_asset_class(columns)
 
 
 # =========================================================
@@ -57,20 +43,7 @@ def infer_asset_class(columns: List[str], contract: dict) -> str:
 # =========================================================
 
 def map_status(asset_class: str, status_raw: str, contract: dict) -> Tuple[str, Optional[str]]:
-    status_raw = clean_string(status_raw)
-    if not status_raw:
-        raise ValueError("Status is missing")
-
-    rules = contract["status_rules"][asset_class]
-    mapped = rules.get(status_raw)
-
-    if not mapped:
-        raise ValueError(f"Unmapped status '{status_raw}' for asset_class '{asset_class}'")
-
-    if mapped.startswith("closed:"):
-        return "closed", mapped.split(":")[1]
-
-    return mapped, None
+    return as_compiled(contract).map_status(asset_class, clean_string(status_raw))
 
 
 # =========================================================
@@ -121,86 +94,4 @@ def classify_xlsx(
 
     asset_class = infer_asset_class(df.columns.tolist(), contract)
 
-    rows: List[Dict[str, Any]] = []
-
-    for _, r in df.iterrows():
-        status_raw = clean_string(r.get("Status"))
-
-        status_group, closed_type = map_status(asset_class, status_raw, contract)
-
-        list_price, close_price = normalize_price(
-            asset_class,
-            status_raw,
-            r.get("Current Price"),
-        )
-
-        row = {
-            "snapshot_date": snapshot_date,
-            "asset_class": asset_class,
-            "status_raw": status_raw,
-            "status_group": status_group,
-            "closed_type": closed_type,
-
-            "ml_number": clean_string(r.get("ML Number")),
-
-            "address": clean_string(r.get("Address")),
-            "city": clean_string(r.get("City")),
-            "zip": clean_string(r.get("Zip")),
-            "county": clean_string(r.get("County")),
-
-            "legal_subdivision_name": clean_string(r.get("Legal Subdivision Name")),
-            "subdivision_condo_name": clean_string(r.get("Subdivision/Condo Name")),
-
-            "property_style_raw": clean_string(r.get("Property Style")),
-            "property_subtype": (
-                "Vacant Land"
-                if asset_class == "land"
-                else clean_string(r.get("Property Style"))
-            ),
-
-            "list_agent": clean_string(r.get("List Agent")),
-            "list_agent_id": clean_string(r.get("List Agent ID")),
-            "selling_office_id": clean_string(r.get("Selling Office ID")),
-            "list_office_id": clean_string(r.get("List Office ID")),
-            "list_office_name": clean_string(r.get("List Office")),
-            "list_office_board_id": clean_string(r.get("List Office Primary Board ID")),
-
-            "list_price": list_price,
-            "close_price": close_price,
-            "close_date": to_date(r.get("Close Date")),
-
-            # common physical
-            "beds": to_numeric(r.get("Beds")),
-            "full_baths": to_numeric(r.get("Full Baths")),
-            "half_baths": to_numeric(r.get("Half Baths")),
-            "heated_area": to_numeric(r.get("Heated Area")),
-            "year_built": to_numeric(r.get("Year Built")),
-            "pool": clean_string(r.get("Pool")),
-
-            # rental-only
-            "pets_allowed": clean_string(r.get("Pets Allowed")),
-            "lease_amount_frequency": clean_string(r.get("Lease Amount Frequency")),
-            "date_available": to_date(r.get("Date Available")),
-
-            # land-only
-            "lot_dimensions": clean_string(r.get("Lot Dimensions")),
-            "lot_size_sqft": to_numeric(r.get("Lot Size Square Footage")),
-            "total_acreage": to_numeric(r.get("Total Acreage")),
-            "zoning": clean_string(r.get("Zoning")),
-            "ownership": clean_string(r.get("Ownership")),
-            "tax": to_numeric(r.get("Tax")),
-
-            # sale-only
-            "adom": to_numeric(r.get("ADOM")),
-            "cdom": to_numeric(r.get("CDOM")),
-            "days_to_contract": to_numeric(r.get("Days to Contract")),
-            "sold_terms": clean_string(r.get("Sold Terms")),
-            "lp_sqft": to_numeric(r.get("LP / SqFt")),
-            "sp_sqft": to_numeric(r.get("SP/SqFt")),
-            "sp_lp": to_numeric(r.get("SP / LP")),
-            "lsc_list_side": clean_string(r.get("LSC List Side")),
-        }
-
-        rows.append(row)
-
-    return pd.DataFrame(rows)
+    return classify_frame(df, contract, asset_class, snapshot_date)
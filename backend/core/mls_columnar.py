@@ -0,0 +1,127 @@
+"""
+Columnar MLS classifier — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Classificar um DataFrame MLS inteiro coluna a coluna (sem iterrows)
+- Cada coluna bruta do column_catalog é convertida UMA vez, em um passe vetorizado
+- Status e preço saem de lookups / máscaras sobre a coluna inteira
+- Saída idêntica ao caminho linha-a-linha (clean_string / to_numeric / to_date)
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from backend.core.mls_contract import CompiledContract, as_compiled
+from backend.core.normalization import clean_string_column
+
+
+def _none_column(n: int) -> np.ndarray:
+    return np.full(n, None, dtype=object)
+
+
+# =========================================================
+# Status mapping / price normalization (vectorized)
+# =========================================================
+
+def map_status_column(
+    asset_class: str,
+    status_raw: np.ndarray,
+    contract: CompiledContract,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Maps a cleaned status column to (status_group, closed_type).
+    Raises the same ValueError as map_status for the first bad row.
+    """
+    status = pd.Series(status_raw, dtype=object)
+    group = status.map(contract.status_group[asset_class])
+
+    bad = group.isna() | (group == "")
+    if bad.any():
+        contract.map_status(asset_class, status[bad].iloc[0])
+
+    closed_type = status.map(contract.closed_type[asset_class])
+    return group.to_numpy(dtype=object), closed_type.astype(object).where(closed_type.notna(), None).to_numpy()
+
+
+def split_price_column(
+    asset_class: str,
+    status_raw: np.ndarray,
+    price: np.ndarray,
+    contract: CompiledContract,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized normalize_price: (list_price, close_price)."""
+    n = len(status_raw)
+    if asset_class not in ("land", "residential_sale", "rental"):
+        return _none_column(n), _none_column(n)
+
+    close_status = contract.close_price_status.get(asset_class, frozenset())
+    is_close = pd.Series(status_raw, dtype=object).isin(close_status).to_numpy()
+
+    list_price = price.copy()
+    list_price[is_close] = None
+    close_price = price.copy()
+    close_price[~is_close] = None
+    return list_price, close_price
+
+
+# =========================================================
+# Main classifier
+# =========================================================
+
+def classify_frame(
+    df: pd.DataFrame,
+    contract: Union[dict, CompiledContract],
+    asset_class: str,
+    snapshot_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    Classifies a DataFrame whose headers were already cleaned.
+    Returns the same frame the row-by-row classifier builds.
+    """
+    snapshot_date = snapshot_date or date.today()
+    contract = as_compiled(contract)
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame()
+
+    # each raw column is converted once, in a single pass
+    converted: Dict[str, np.ndarray] = {}
+
+    def column(raw: str) -> np.ndarray:
+        if raw not in converted:
+            if raw in df.columns:
+                converted[raw] = contract.converters[raw](df[raw])
+            else:
+                converted[raw] = _none_column(n)
+        return converted[raw]
+
+    status_raw = clean_string_column(df["Status"]) if "Status" in df.columns else _none_column(n)
+    status_group, closed_type = map_status_column(asset_class, status_raw, contract)
+    list_price, close_price = split_price_column(
+        asset_class, status_raw, column("Current Price"), contract
+    )
+
+    out: Dict[str, np.ndarray] = {
+        "snapshot_date": np.full(n, snapshot_date, dtype=object),
+        "asset_class": np.full(n, asset_class, dtype=object),
+        "status_raw": status_raw,
+        "status_group": status_group,
+        "closed_type": closed_type,
+    }
+
+    for name, raw, _kind in contract.fields:
+        if name == "list_price":
+            out[name] = list_price
+        elif name == "close_price":
+            out[name] = close_price
+        elif name == "property_subtype" and asset_class == "land":
+            out[name] = np.full(n, "Vacant Land", dtype=object)
+        else:
+            out[name] = column(raw)
+
+    return pd.DataFrame(out).infer_objects()
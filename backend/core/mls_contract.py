@@ -0,0 +1,294 @@
+"""
+Compiled MLS contract — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Ler mls_column_contract.yaml UMA vez por processo
+- Pré-computar o que os classificadores usam em toda linha:
+  assinaturas, raw -> canonical, status lookup, regras de preço, conversores
+- Invalidar o cache por mtime (+ hash do conteúdo)
+
+O objeto compilado também se comporta como o dict do YAML
+(contract["status_rules"], contract.get(...)), então funções antigas
+que recebem `contract: dict` continuam funcionando.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import functools
+import hashlib
+import json
+import re
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from backend.core.normalization import clean_string_column, is_month_first, to_date_column, to_numeric_column
+
+DEFAULT_CONTRACT_PATH = Path("backend/contract/mls_column_contract.yaml")
+
+
+# =========================================================
+# Output layout (stg_mls_classified)
+# =========================================================
+
+# output column -> (raw column, converter kind)
+# kinds: "string" (clean_string), "numeric" (to_numeric), "date" (to_date)
+CLASSIFIED_FIELDS: List[Tuple[str, str, str]] = [
+    ("ml_number", "ML Number", "string"),
+    ("address", "Address", "string"),
+    ("city", "City", "string"),
+    ("zip", "Zip", "string"),
+    ("county", "County", "string"),
+    ("legal_subdivision_name", "Legal Subdivision Name", "string"),
+    ("subdivision_condo_name", "Subdivision/Condo Name", "string"),
+    ("property_style_raw", "Property Style", "string"),
+    ("property_subtype", "Property Style", "string"),
+    ("list_agent", "List Agent", "string"),
+    ("list_agent_id", "List Agent ID", "string"),
+    ("selling_office_id", "Selling Office ID", "string"),
+    ("list_office_id", "List Office ID", "string"),
+    ("list_office_name", "List Office", "string"),
+    ("list_office_board_id", "List Office Primary Board ID", "string"),
+    ("list_price", "Current Price", "numeric"),
+    ("close_price", "Current Price", "numeric"),
+    ("close_date", "Close Date", "date"),
+    ("beds", "Beds", "numeric"),
+    ("full_baths", "Full Baths", "numeric"),
+    ("half_baths", "Half Baths", "numeric"),
+    ("heated_area", "Heated Area", "numeric"),
+    ("year_built", "Year Built", "numeric"),
+    ("pool", "Pool", "string"),
+    ("pets_allowed", "Pets Allowed", "string"),
+    ("lease_amount_frequency", "Lease Amount Frequency", "string"),
+    ("date_available", "Date Available", "date"),
+    ("lot_dimensions", "Lot Dimensions", "string"),
+    ("lot_size_sqft", "Lot Size Square Footage", "numeric"),
+    ("total_acreage", "Total Acreage", "numeric"),
+    ("zoning", "Zoning", "string"),
+    ("ownership", "Ownership", "string"),
+    ("tax", "Tax", "numeric"),
+    ("adom", "ADOM", "numeric"),
+    ("cdom", "CDOM", "numeric"),
+    ("days_to_contract", "Days to Contract", "numeric"),
+    ("sold_terms", "Sold Terms", "string"),
+    ("lp_sqft", "LP / SqFt", "numeric"),
+    ("sp_sqft", "SP/SqFt", "numeric"),
+    ("sp_lp", "SP / LP", "numeric"),
+    ("lsc_list_side", "LSC List Side", "string"),
+]
+
+CONVERTERS: Dict[str, Callable[[pd.Series], np.ndarray]] = {
+    "string": clean_string_column,
+    "numeric": to_numeric_column,
+    "date": to_date_column,
+}
+
+
+# =========================================================
+# Compiled contract
+# =========================================================
+
+@dataclass(frozen=True, eq=False)
+class CompiledContract(Mapping):
+    data: dict
+    path: Optional[Path] = None
+    mtime_ns: Optional[int] = None
+    sha256: Optional[str] = None
+
+    rental_signature: FrozenSet[str] = frozenset()
+    land_signature: FrozenSet[str] = frozenset()
+    raw_to_canonical: Dict[str, str] = field(default_factory=dict)
+
+    # asset_class -> {status_raw: status_group} / {status_raw: closed_type}
+    status_group: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    closed_type: Dict[str, Dict[str, Optional[str]]] = field(default_factory=dict)
+    # asset_class -> statuses whose Current Price is a close price
+    close_price_status: Dict[str, FrozenSet[str]] = field(default_factory=dict)
+
+    fields: Tuple[Tuple[str, str, str], ...] = ()
+    # raw column -> vectorized converter / reader dtype
+    converters: Dict[str, Callable[[pd.Series], np.ndarray]] = field(default_factory=dict)
+    reader_dtypes: Dict[str, str] = field(default_factory=dict)
+
+    # --- dict compatibility (raw YAML) ---
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    # --- precomputed lookups ---
+    def infer_asset_class(self, columns: Iterable[str]) -> str:
+        cols = set(columns)
+        if self.rental_signature.intersection(cols):
+            return "rental"
+        if self.land_signature.intersection(cols):
+            return "land"
+        return "residential_sale"
+
+    def map_status(self, asset_class: str, status_raw: Optional[str]) -> Tuple[str, Optional[str]]:
+        if not status_raw:
+            raise ValueError("Status is missing")
+
+        group = self.status_group[asset_class].get(status_raw)
+        if not group:
+            raise ValueError(f"Unmapped status '{status_raw}' for asset_class '{asset_class}'")
+
+        return group, self.closed_type[asset_class][status_raw]
+
+
+_RULE_ASSET = re.compile(r"asset_class\s*(?:=\s*(\w+)|in\s*\(([^)]*)\))")
+_RULE_STATUS = re.compile(r"status_raw\s*(?:=\s*(\w+)|in\s*\(([^)]*)\))")
+
+
+def _rule_values(match: Optional[re.Match], rule: str) -> List[str]:
+    if match is None:
+        raise ValueError(f"Unsupported price_normalization rule: {rule}")
+    single, many = match.groups()
+    return [single] if single else [v.strip() for v in many.split(",")]
+
+
+def _close_price_status(contract: dict) -> Dict[str, FrozenSet[str]]:
+    out: Dict[str, set] = {}
+    for rule in contract.get("price_normalization", {}).get("rules", []):
+        if not rule["set"].replace(" ", "").startswith("close_price="):
+            continue
+        when = rule["when"]
+        for asset_class in _rule_values(_RULE_ASSET.search(when), when):
+            out.setdefault(asset_class, set()).update(_rule_values(_RULE_STATUS.search(when), when))
+    return {k: frozenset(v) for k, v in out.items()}
+
+
+def _converter(kind: str, entry: Optional[dict]) -> Callable[[pd.Series], np.ndarray]:
+    """Column converter; a catalog `format:` on a date column is tried first (vectorized)."""
+    fmt = (entry or {}).get("format")
+    if kind != "date" or not fmt:
+        return CONVERTERS[kind]
+    if not is_month_first(fmt):
+        raise ValueError(f"Date format '{fmt}' of '{entry['raw']}' would not match to_date (day before month or two-digit year)")
+    return functools.partial(to_date_column, formats=(fmt,))
+
+
+def compile_contract(
+    contract: dict,
+    path: Optional[Path] = None,
+    mtime_ns: Optional[int] = None,
+    sha256: Optional[str] = None,
+) -> CompiledContract:
+    catalog = contract.get("column_catalog", [])
+    raw_to_canonical = {c["raw"]: c["canonical"] for c in catalog}
+    catalog_by_raw = {c["raw"]: c for c in catalog}
+
+    missing = sorted({raw for _, raw, _ in CLASSIFIED_FIELDS} - set(raw_to_canonical))
+    if catalog and missing:
+        raise ValueError(f"Contract column_catalog is missing raw columns: {missing}")
+
+    status_group: Dict[str, Dict[str, str]] = {}
+    closed_type: Dict[str, Dict[str, Optional[str]]] = {}
+    for asset_class, rules in contract["status_rules"].items():
+        status_group[asset_class], closed_type[asset_class] = {}, {}
+        for status_raw, mapped in rules.items():
+            if mapped and mapped.startswith("closed:"):
+                status_group[asset_class][status_raw] = "closed"
+                closed_type[asset_class][status_raw] = mapped.split(":")[1]
+            else:
+                status_group[asset_class][status_raw] = mapped
+                closed_type[asset_class][status_raw] = None
+
+    return CompiledContract(
+        data=contract,
+        path=path,
+        mtime_ns=mtime_ns,
+        sha256=sha256,
+        rental_signature=frozenset(contract["signatures"]["rental_if_has_any"]),
+        land_signature=frozenset(contract["signatures"]["land_if_has_any"]),
+        raw_to_canonical=raw_to_canonical,
+        status_group=status_group,
+        closed_type=closed_type,
+        close_price_status=_close_price_status(contract),
+        fields=tuple(CLASSIFIED_FIELDS),
+        converters={raw: _converter(kind, catalog_by_raw.get(raw)) for _, raw, kind in CLASSIFIED_FIELDS},
+        # every catalog column is read as text: prices come as "$1,234",
+        # IDs and ZIPs must not be float-upcast, the converters own typing
+        reader_dtypes={raw: "str" for raw in raw_to_canonical},
+    )
+
+
+# =========================================================
+# Process-wide cache
+# =========================================================
+
+_lock = threading.Lock()
+_by_path: Dict[Path, CompiledContract] = {}
+_by_dict: Dict[str, CompiledContract] = {}
+_BY_DICT_MAX = 16
+
+
+def get_contract(contract_path: Union[str, Path] = DEFAULT_CONTRACT_PATH) -> CompiledContract:
+    """
+    Returns the compiled contract for `contract_path`, parsing the YAML only
+    when the file is new, its mtime changed AND its content hash changed.
+    """
+    path = Path(contract_path).resolve()
+    if not path.exists():
+        raise FileNotFoundError(f"Contract not found: {contract_path}")
+
+    mtime_ns = path.stat().st_mtime_ns
+    with _lock:
+        cached = _by_path.get(path)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            return cached
+
+        raw = path.read_bytes()
+        sha = hashlib.sha256(raw).hexdigest()
+        if cached is not None and cached.sha256 == sha:
+            compiled = dataclasses.replace(cached, mtime_ns=mtime_ns)  # touched, not changed: no recompile
+        else:
+            compiled = compile_contract(yaml.safe_load(raw.decode("utf-8")), path, mtime_ns, sha)
+
+        _by_path[path] = compiled
+        return compiled
+
+
+def _dict_digest(contract: dict) -> str:
+    """sha256 of the dict's content (key order ignored)."""
+    return hashlib.sha256(json.dumps(contract, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def as_compiled(contract: Union[dict, CompiledContract]) -> CompiledContract:
+    """
+    Accepts a compiled contract or a raw YAML dict, compiled once per distinct
+    content: equal dicts share an entry and a dict mutated in place recompiles.
+    Hashing a dict costs ~0.1 ms, so loops compile once up front and pass
+    the CompiledContract (returned as is).
+    """
+    if isinstance(contract, CompiledContract):
+        return contract
+
+    key = _dict_digest(contract)
+    with _lock:
+        compiled = _by_dict.get(key)
+        if compiled is not None:
+            return compiled
+
+        compiled = compile_contract(contract)
+        if len(_by_dict) >= _BY_DICT_MAX:
+            _by_dict.pop(next(iter(_by_dict)))
+        _by_dict[key] = compiled
+        return compiled
+
+
+def clear_contract_cache() -> None:
+    with _lock:
+        _by_path.clear()
+        _by_dict.clear()
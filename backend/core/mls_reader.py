@@ -0,0 +1,332 @@
+"""
+MLS file readers — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Ler exports MLS em blocos de linhas de tamanho fixo (memória constante)
+- Entregar DataFrames crus (headers originais) para o classificador
+- NÃO contém regras de negócio
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 20_000
+
+# same tokens read_excel / read_csv treat as missing by default
+NA_TOKENS = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+])
+
+
+# =========================================================
+# Format detection
+# =========================================================
+
+_XLSX_MAGIC = b"PK\x03\x04"
+_XLS_MAGIC = b"\xd0\xcf\x11\xe0"
+
+
+Source = Union[str, Path, bytes, bytearray, memoryview]
+
+
+def _open_source(source: Source) -> BinaryIO:
+    """A path or an in-memory upload (bytes / memoryview) as a binary file."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return Path(source).open("rb")
+
+
+def _format_of(head: bytes, name: str) -> str:
+    if head == _XLSX_MAGIC:
+        return "xlsx"
+    if head == _XLS_MAGIC:
+        raise ValueError(f"Legacy .xls is not supported, re-export as .xlsx or .csv: {name}")
+    if Path(name).suffix.lower() in {".xlsx", ".xlsm"}:
+        raise ValueError(f"File is not a valid XLSX workbook: {name}")
+    return "csv"
+
+
+def detect_format(path: str | Path, name: Optional[str] = None) -> str:
+    """
+    Returns "xlsx" or "csv", by magic bytes first and extension second.
+    `path` may also be an in-memory upload, named by `name`.
+    """
+    with _open_source(path) as f:
+        head = f.read(4)
+    if name is None and not isinstance(path, (bytes, bytearray, memoryview)):
+        name = Path(path).name
+    return _format_of(head, name or "")
+
+
+# =========================================================
+# XLSX
+# =========================================================
+
+def _convert_cell(cell) -> Any:
+    """Mirrors pandas' openpyxl cell conversion (int-like floats -> int)."""
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    value = cell.value
+    if value is None:
+        return None
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        as_int = int(value)
+        return as_int if as_int == value else float(value)
+    if isinstance(value, str) and value in NA_TOKENS:
+        return None
+    return value
+
+
+def _header_names(values: List[Any]) -> List[str]:
+    names: List[str] = []
+    seen: dict = {}
+    for i, v in enumerate(values):
+        name = f"Unnamed: {i}" if v is None else v
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def iter_xlsx_chunks(
+    xlsx_path: str | Path,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    sheet_name: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams the first (or the named) sheet of an XLSX file in blocks of
+    `chunk_rows` rows, using openpyxl's read-only mode.
+
+    Chunks are object-dtype frames holding the workbook's typed cell values,
+    so every chunk classifies the same way regardless of chunk size.
+    Blank rows are skipped, like read_excel does.
+    """
+    from openpyxl import load_workbook
+
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+
+    wb = load_workbook(Path(xlsx_path), read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+
+        header: Optional[List[str]] = None
+        buffer: List[List[Any]] = []
+
+        for row in ws.iter_rows():
+            values = [_convert_cell(c) for c in row]
+            if all(v is None for v in values):
+                continue
+
+            if header is None:
+                header = _header_names(values)
+                continue
+
+            if len(values) < len(header):
+                values += [None] * (len(header) - len(values))
+            buffer.append(values[: len(header)])
+
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=header, dtype=object)
+                buffer = []
+
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header, dtype=object)
+    finally:
+        wb.close()
+
+
+# =========================================================
+# CSV
+# =========================================================
+
+def _csv_header(csv_path: Path, encoding: str) -> List[str]:
+    with csv_path.open("r", encoding=encoding, newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def _iter_csv_arrow(csv_path: Path, header: List[str], dtypes: Dict[str, str], chunk_rows: int, encoding: str):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    arrow_types = {"str": pa.string(), "float64": pa.float64(), "Int64": pa.int64()}
+    # arrow skips the UTF-8 BOM natively; other encodings are transcoded
+    if encoding.lower().replace("-", "").replace("_", "") in {"utf8", "utf8sig"}:
+        encoding = "utf8"
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(use_threads=True, encoding=encoding, block_size=8 << 20),
+        convert_options=pacsv.ConvertOptions(
+            column_types={c: arrow_types[dtypes.get(c, "str")] for c in header},
+            null_values=sorted(NA_TOKENS),
+            strings_can_be_null=True,
+        ),
+    )
+
+    pending: List[Any] = []
+    pending_rows = 0
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunk_rows:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_rows).to_pandas()
+            rest = table.slice(chunk_rows)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+
+    if pending_rows:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+def _iter_csv_pandas(csv_path: Path, header: List[str], dtypes: Dict[str, str], chunk_rows: int, encoding: str):
+    reader = pd.read_csv(
+        csv_path,
+        engine="c",
+        dtype={c: dtypes.get(c, "str") for c in header},
+        chunksize=chunk_rows,
+        encoding=encoding,
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk.reset_index(drop=True)
+
+
+def iter_csv_chunks(
+    csv_path: str | Path,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    dtypes: Optional[Dict[str, str]] = None,
+    encoding: str = "utf-8-sig",
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams a CSV export in blocks of `chunk_rows` rows.
+
+    Uses pyarrow's multi-threaded CSV reader when installed, pandas' C
+    parser otherwise. Column dtypes are fixed up front (`dtypes`, raw
+    column -> "str" / "float64" / "Int64"; unlisted columns are read as
+    text), so there is no per-chunk type inference.
+    """
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+
+    csv_path = Path(csv_path)
+    header = _csv_header(csv_path, encoding)
+    if not header:
+        return
+
+    dtypes = dtypes or {}
+    try:
+        import pyarrow.csv  # noqa: F401
+    except ImportError:
+        yield from _iter_csv_pandas(csv_path, header, dtypes, chunk_rows, encoding)
+        return
+
+    yield from _iter_csv_arrow(csv_path, header, dtypes, chunk_rows, encoding)
+
+
+# =========================================================
+# Header / column pre-reads (validation)
+# =========================================================
+
+def read_header(source: Source, name: Optional[str] = None, encoding: str = "utf-8-sig") -> List[str]:
+    """Column names only: the first non-blank XLSX row or the CSV header line."""
+    if detect_format(source, name) == "xlsx":
+        from openpyxl import load_workbook
+
+        with _open_source(source) as f:
+            wb = load_workbook(f, read_only=True, data_only=True)
+            try:
+                for values in wb.worksheets[0].iter_rows(values_only=True):
+                    if any(v is not None for v in values):
+                        return _header_names(list(values))
+                return []
+            finally:
+                wb.close()
+
+    with _open_source(source) as f:
+        return next(csv.reader(io.TextIOWrapper(f, encoding=encoding, newline="")), [])
+
+
+def read_csv_columns(source: Source, columns: List[str], encoding: str = "utf-8-sig") -> pd.DataFrame:
+    """
+    A few CSV columns as text in one columnar pass (pyarrow include_columns,
+    pandas usecols otherwise), with the same missing-value tokens as the chunk readers.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        with _open_source(source) as f:
+            return pd.read_csv(f, usecols=columns, dtype=str, encoding=encoding)
+
+    if encoding.lower().replace("-", "").replace("_", "") in {"utf8", "utf8sig"}:
+        encoding = "utf8"
+    with _open_source(source) as f:
+        table = pacsv.read_csv(
+            f,
+            read_options=pacsv.ReadOptions(use_threads=True, encoding=encoding),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=columns,
+                column_types={c: pa.string() for c in columns},
+                null_values=sorted(NA_TOKENS),
+                strings_can_be_null=True,
+            ),
+        )
+    return table.to_pandas()
+
+
+def read_xlsx_column(source: Source, column: str) -> pd.Series:
+    """
+    One column of the first XLSX sheet, in a single read-only pass that
+    converts only that column's cells (openpyxl still parses every row). Blank rows are skipped and missing
+    tokens are None, like iter_xlsx_chunks, so row counts match the chunks.
+    """
+    from openpyxl import load_workbook
+
+    values: List[Any] = []
+    with _open_source(source) as f:
+        wb = load_workbook(f, read_only=True, data_only=True)
+        try:
+            idx: Optional[int] = None
+            for row in wb.worksheets[0].iter_rows(values_only=True):
+                if all(v is None for v in row):
+                    continue
+                if idx is None:
+                    header = _header_names(list(row))
+                    if column not in header:
+                        raise KeyError(f"column {column!r} not in sheet header")
+                    idx = header.index(column)
+                    continue
+                v = row[idx] if idx < len(row) else None
+                if isinstance(v, str) and v in NA_TOKENS:
+                    v = None
+                elif isinstance(v, float) and v.is_integer():
+                    v = int(v)
+                values.append(v)
+        finally:
+            wb.close()
+    return pd.Series(values, name=column, dtype=object)
+
+
+def iter_file_chunks(
+    path: str | Path,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    dtypes: Optional[Dict[str, str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Dispatches to the XLSX or CSV chunk reader based on detect_format."""
+    if detect_format(path) == "xlsx":
+        return iter_xlsx_chunks(path, chunk_rows=chunk_rows)
+    return iter_csv_chunks(path, chunk_rows=chunk_rows, dtypes=dtypes)
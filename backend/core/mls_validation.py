@@ -0,0 +1,199 @@
+"""
+MLS pre-validation — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Rejeitar um arquivo ANTES de classificar / inserir qualquer linha:
+    headers  -> coluna Status (erro), colunas comuns do contrato e asset_class
+                das assinaturas vs. o tipo escolhido no upload (avisos)
+    statuses -> valores distintos de Status vs. status_rules, numa varredura
+                só da coluna Status (CSV: leitura colunar). XLSX só com
+                sweep_xlsx: ler uma coluna custa uma passada inteira do
+                openpyxl, então por padrão os chunks pegam os status ruins
+- Quarentena: separar de cada chunk as linhas com Status ausente ou não
+  mapeado, que vão para a tabela de rejeitos enquanto as boas seguem
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.core.mls_contract import CompiledContract
+from backend.core.mls_reader import Source, detect_format, read_csv_columns, read_header, read_xlsx_column
+from backend.core.normalization import clean_string, clean_string_column
+
+# upload category (UI / silo asset_class) -> contract asset class
+CATEGORY_ASSET_CLASS = {"Properties": "residential_sale", "Land": "land", "Rental": "rental"}
+REQUIRED_COLUMNS = ("Status",)
+STATUS_SAMPLE = 5  # unmapped values quoted in an error message
+
+
+@dataclass
+class FileValidation:
+    file: str
+    format: str
+    asset_class: Optional[str] = None
+    missing_columns: List[str] = field(default_factory=list)
+    # cleaned Status value -> rows
+    unmapped_statuses: Dict[str, int] = field(default_factory=dict)
+    missing_status: int = 0
+    statuses_checked: bool = False
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def bad_rows(self) -> int:
+        return self.missing_status + sum(self.unmapped_statuses.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), ok=self.ok, bad_rows=self.bad_rows)
+
+
+# =========================================================
+# Headers
+# =========================================================
+
+def check_headers(
+    report: FileValidation,
+    columns: Iterable[str],
+    contract: CompiledContract,
+    category: Optional[str] = None,
+) -> FileValidation:
+    """Header checks on cleaned column names; fills report.asset_class / errors / warnings."""
+    cols = set(columns)
+    report.asset_class = contract.infer_asset_class(cols)
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in cols]
+    if missing:
+        report.errors.append(f"{report.file}: missing required column(s) {missing}")
+
+    common = contract.get("common_columns", {}).get("all_three", [])
+    report.missing_columns = [c for c in common if c not in cols]
+    if report.missing_columns:
+        report.warnings.append(f"{report.file}: missing contract column(s) {report.missing_columns}")
+
+    if contract.rental_signature & cols and contract.land_signature & cols:
+        report.warnings.append(f"{report.file}: has both rental and land signature columns, read as {report.asset_class}")
+
+    # the rows still load under the chosen category (statuses map by the columns' asset class)
+    expected = CATEGORY_ASSET_CLASS.get(category) if category else None
+    if expected and expected != report.asset_class:
+        report.warnings.append(f"{report.file}: uploaded as {category} but its columns match a {report.asset_class} export")
+    return report
+
+
+# =========================================================
+# Statuses
+# =========================================================
+
+def status_problems(asset_class: str, status_raw: np.ndarray, contract: CompiledContract) -> np.ndarray:
+    """
+    Per-row reason map_status would raise: None, "missing_status" or
+    "unmapped_status" (status_raw already cleaned).
+    """
+    status = pd.Series(status_raw, dtype=object)
+    group = status.map(contract.status_group[asset_class])
+    bad = (group.isna() | (group == "")).to_numpy()
+    missing = status.isna().to_numpy()
+
+    reason = np.full(len(status), None, dtype=object)
+    reason[bad & missing] = "missing_status"
+    reason[bad & ~missing] = "unmapped_status"
+    return reason
+
+
+def check_statuses(status: pd.Series, asset_class: str, contract: CompiledContract) -> Tuple[Dict[str, int], int]:
+    """(unmapped value -> rows, rows without status) over a whole Status column."""
+    counts = pd.Series(clean_string_column(status), dtype=object).value_counts(dropna=False)
+    mapping = contract.status_group[asset_class]
+    unmapped = {str(v): int(n) for v, n in counts.items() if not pd.isna(v) and not mapping.get(v)}
+    missing = int(sum(n for v, n in counts.items() if pd.isna(v)))
+    return unmapped, missing
+
+
+def _status_message(report: FileValidation) -> str:
+    parts = []
+    if report.unmapped_statuses:
+        top = sorted(report.unmapped_statuses.items(), key=lambda kv: -kv[1])[:STATUS_SAMPLE]
+        parts.append(f"unmapped status {', '.join(f'{v!r} ({n} rows)' for v, n in top)} for asset_class '{report.asset_class}'")
+    if report.missing_status:
+        parts.append(f"{report.missing_status} rows without status")
+    return f"{report.file}: " + "; ".join(parts)
+
+
+# =========================================================
+# Pre-pass
+# =========================================================
+
+def prevalidate(
+    source: Source,
+    name: str,
+    contract: CompiledContract,
+    category: Optional[str] = None,
+    quarantine: bool = False,
+    sweep_xlsx: bool = False,
+) -> FileValidation:
+    """
+    Validates one upload (path or bytes) without classifying it. Headers are
+    checked for every file (first row only), then the Status column alone is
+    swept for CSV, where a columnar read is cheap. An XLSX sheet can only be
+    read whole (the sweep would parse it twice), so its statuses are left to
+    the chunks (classify_frame / split_rejects) unless sweep_xlsx is set.
+    With quarantine, bad statuses are warnings: those rows go to the rejects table.
+    """
+    report = FileValidation(file=name, format=detect_format(source, name))
+    raw_header = read_header(source, name)
+    header = {clean_string(c): c for c in raw_header if clean_string(c)}
+    check_headers(report, header, contract, category)
+    if not report.ok or (report.format == "xlsx" and not sweep_xlsx):
+        return report
+
+    if report.format == "xlsx":
+        status = read_xlsx_column(source, header["Status"])
+    else:
+        status = read_csv_columns(source, [header["Status"]])[header["Status"]]
+    report.unmapped_statuses, report.missing_status = check_statuses(status, report.asset_class, contract)
+    report.statuses_checked = True
+    if report.bad_rows:
+        (report.warnings if quarantine else report.errors).append(_status_message(report))
+    return report
+
+
+# =========================================================
+# Quarantine
+# =========================================================
+
+def split_rejects(
+    df: pd.DataFrame,
+    asset_class: str,
+    contract: CompiledContract,
+    first_row: int = 0,
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Splits a raw chunk (headers cleaned) into the rows classify_frame can map
+    and the rejected ones: row_number (1-based data row of the file),
+    status_raw, reason and the raw row as JSON.
+    """
+    status_raw = clean_string_column(df["Status"]) if "Status" in df.columns else np.full(len(df), None, dtype=object)
+    reason = status_problems(asset_class, status_raw, contract)
+    bad = pd.notna(reason)
+    if not bad.any():
+        return df, None
+
+    raw = df[bad]
+    raw = raw.astype(object).where(raw.notna(), None)
+    rejects = pd.DataFrame({
+        "row_number": first_row + 1 + np.flatnonzero(bad),
+        "status_raw": status_raw[bad],
+        "reason": reason[bad],
+        "raw_row": [json.dumps(r, default=str) for r in raw.to_dict(orient="records")],
+    })
+    return df[~bad].reset_index(drop=True), rejects
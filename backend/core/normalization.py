@@ -6,13 +6,25 @@ Serve apenas para conversões técnicas:
 - strings
 - números
 - datas
+
+Cada conversão existe por valor (clean_string / to_numeric / to_date) e por
+coluna inteira (*_column), com resultado idêntico.
+
+As versões por coluna trabalham sobre os valores distintos (factorize ->
+converte cada valor uma vez -> broadcast pelos códigos): City, Status, Zip,
+agentes etc. têm poucas centenas de valores por export, então o custo
+acompanha a cardinalidade e não o número de linhas.
 """
 
 from datetime import date, datetime
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, Callable, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+_NULL_TOKENS = ["", "nan", "none", "null"]
+
 
 def clean_string(value: Any) -> Optional[str]:
     if value is None:
@@ -61,8 +73,257 @@ def to_date(value: Any) -> Optional[date]:
     if not s:
         return None
 
+    return _parse_date(s)
+
+
+@lru_cache(maxsize=65536)
+def _parse_date(s: str) -> Optional[date]:
+    # one format inference per distinct string, process-wide (dates repeat a lot)
     parsed = pd.to_datetime(s, errors="coerce")
     if pd.isna(parsed):
         return None
 
     return parsed.date()
+
+
+def is_month_first(fmt: str) -> bool:
+    """
+    True when every string matching strptime format `fmt` parses to the same
+    date under to_date's inference (month before day, as dateutil defaults).
+    Two-digit years never do: strptime pivots %y at 1969, dateutil at
+    today +-50 years ('01/05/69' is 1969 vs. 2069).
+    """
+    if "%z" in fmt or "%Z" in fmt or "%y" in fmt:
+        return False
+    day = fmt.find("%d")
+    month = max(fmt.find("%m"), fmt.find("%b"), fmt.find("%B"))
+    return not (day >= 0 and month >= 0 and day < month)
+
+
+# ---------------------------------------------------------
+# Column-wise (vectorized) versions
+# ---------------------------------------------------------
+
+def _none_column(n: int) -> np.ndarray:
+    return np.full(n, None, dtype=object)
+
+
+_DISTINCT_SAMPLE = 4096  # rows sampled to estimate a column's cardinality
+_DISTINCT_MAX_RATIO = 0.5  # above this share of distinct values, hashing does not pay off
+
+
+def _mostly_distinct(s: pd.Series) -> bool:
+    sample = s.iloc[:: max(1, len(s) // _DISTINCT_SAMPLE)]
+    return sample.nunique(dropna=False) > _DISTINCT_MAX_RATIO * len(sample)
+
+
+def factorize_column(s: pd.Series) -> Tuple[np.ndarray, np.ndarray, Any]:
+    """
+    Distinct values of a column keyed by str(): (codes, uniques, na).
+    uniques is an array of str; code -1 stands for the dtype's NA
+    value `na` (string dtypes only). Keying by str() keeps 1 / 1.0 / True
+    apart and is exact for every conversion that starts with str(value).
+    Near-unique columns (IDs, addresses) skip the hashing: one code per row.
+    """
+    if _mostly_distinct(s):
+        na = s.dtype.na_value if isinstance(s.dtype, pd.StringDtype) else None
+        missing = s.isna().to_numpy() if na is not None else np.zeros(len(s), dtype=bool)
+        codes = np.where(missing, -1, np.arange(len(s)))
+        return codes, np.asarray(s, dtype=object).astype(str), na
+
+    if isinstance(s.dtype, pd.StringDtype):
+        codes, uniques = pd.factorize(s)
+        return codes, np.asarray(uniques, dtype=object), s.dtype.na_value
+
+    codes, uniques = pd.factorize(np.asarray(s, dtype=object).astype(str))
+    return codes, np.asarray(uniques, dtype=object), None
+
+
+def broadcast_distinct(values: np.ndarray, na_value: Any, codes: np.ndarray) -> np.ndarray:
+    """Per-row object array from one converted value per distinct value (code -1 -> na_value)."""
+    table = np.empty(len(values) + 1, dtype=object)
+    table[:-1] = values
+    table[-1] = na_value
+    return table[codes]
+
+
+def map_distinct(s: pd.Series, func: Callable[[Any], Any]) -> np.ndarray:
+    """
+    func applied once per distinct value, broadcast back to every row.
+    Only for functions of str(value) (clean_string, to_numeric of text...).
+    """
+    if len(s) == 0:
+        return np.empty(0, dtype=object)
+    codes, uniques, na = factorize_column(s)
+    values = np.empty(len(uniques), dtype=object)
+    values[:] = [func(u) for u in uniques]
+    return broadcast_distinct(values, func(na), codes)
+
+
+def _clean_strings(text: np.ndarray) -> np.ndarray:
+    """clean_string over a str array (no None / NaN in it)."""
+    text = np.char.strip(text.astype(str, copy=False))
+
+    # only strings up to len("none") can be null tokens
+    short = np.char.str_len(text) <= 4
+    null = np.zeros(len(text), dtype=bool)
+    null[short] = np.isin(np.char.lower(text[short]), _NULL_TOKENS)
+
+    out = text.astype(object)
+    out[null] = None
+    return out
+
+
+def clean_string_column(s: pd.Series) -> np.ndarray:
+    """Vectorized clean_string: object array of str / None."""
+    if len(s) == 0:
+        return np.empty(0, dtype=object)
+
+    codes, uniques, na = factorize_column(s)
+    return broadcast_distinct(_clean_strings(uniques), clean_string(na), codes)
+
+
+def _parse_floats(text: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """float() over a str array of distinct values -> (values, parsed mask)."""
+    try:
+        return text.astype(float), np.ones(len(text), dtype=bool)
+    except ValueError:
+        pass
+
+    # dirty column: parse value by value
+    values = np.full(len(text), np.nan)
+    ok = np.zeros(len(text), dtype=bool)
+    for i, u in enumerate(text):
+        try:
+            values[i] = float(u)
+            ok[i] = True
+        except ValueError:
+            pass
+    return values, ok
+
+
+def to_numeric_column(s: pd.Series) -> np.ndarray:
+    """Vectorized to_numeric: object array of float / None."""
+    n = len(s)
+    if n == 0:
+        return np.empty(0, dtype=object)
+
+    if pd.api.types.is_bool_dtype(s.dtype) or (
+        pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_object_dtype(s.dtype)
+    ):
+        values = s.to_numpy(dtype=float, na_value=np.nan)
+        out = values.astype(object)
+        out[np.isnan(values)] = None
+        return out
+
+    out = _none_column(n)
+    raw = np.asarray(s, dtype=object)
+
+    # python int/float cells (mixed object columns) skip string parsing
+    number = np.zeros(n, dtype=bool)
+    if pd.api.types.infer_dtype(raw, skipna=True) not in ("string", "empty"):
+        number = np.fromiter(
+            (isinstance(v, (int, float)) and v == v for v in raw), dtype=bool, count=n
+        )
+        out[number] = [float(v) for v in raw[number]]
+
+    # text cells: strip / "$" / "," / float() once per distinct value
+    rest = s if not number.any() else pd.Series(raw[~number], dtype=object)
+    codes, uniques, na = factorize_column(rest)
+    cleaned = _clean_strings(uniques)
+    present = pd.notna(cleaned)
+
+    parsed = _none_column(len(uniques))
+    if present.any():
+        text = cleaned[present].astype(str)
+        text = np.char.replace(np.char.replace(text, "$", ""), ",", "")
+        values, ok = _parse_floats(text)
+        parsed[present] = np.where(ok, values.astype(object), None)
+
+    out[~number] = broadcast_distinct(parsed, to_numeric(na), codes)
+    return out
+
+
+_GUESS_SAMPLE = 5  # distinct strings tried when guessing a column's format
+
+
+def _guess_date_format(uniques: np.ndarray) -> Optional[str]:
+    try:
+        from pandas.tseries.api import guess_datetime_format
+    except ImportError:  # pandas < 2.2
+        from pandas._libs.tslibs.parsing import guess_datetime_format
+
+    import warnings
+
+    for u in uniques[:_GUESS_SAMPLE]:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            fmt = guess_datetime_format(u)
+        if fmt and is_month_first(fmt):
+            return fmt
+    return None
+
+
+def _parse_date_strings(uniques: np.ndarray, formats: Sequence[str]) -> np.ndarray:
+    """to_date over distinct cleaned strings: one strict pass per format, then one at a time."""
+    out = _none_column(len(uniques))
+    todo = np.ones(len(uniques), dtype=bool)
+    for fmt in formats:
+        if not todo.any():
+            break
+        idx = np.flatnonzero(todo)
+        try:
+            parsed = pd.to_datetime(pd.Series(uniques[idx]), format=fmt, errors="coerce")
+        except (ValueError, TypeError):
+            continue
+        hit = parsed.notna().to_numpy()
+        out[idx[hit]] = parsed[hit].dt.date.to_numpy(dtype=object)
+        todo[idx[hit]] = False
+
+    for i in np.flatnonzero(todo):
+        out[i] = _parse_date(uniques[i])
+    return out
+
+
+def to_date_column(s: pd.Series, formats: Sequence[str] = ()) -> np.ndarray:
+    """
+    Vectorized to_date: object array of date / NaT / None.
+
+    Strings are factorized and each distinct value cleaned and parsed once:
+    first with `formats` (e.g. declared in the contract) plus the format
+    guessed from the column, in one strict vectorized pass each, the rest
+    through to_date's own inference. Only month-first formats are used
+    (is_month_first), so the result is always what to_date returns.
+    """
+    n = len(s)
+    if n == 0:
+        return np.empty(0, dtype=object)
+
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        out = s.dt.date.to_numpy(dtype=object, copy=True)
+        out[s.isna().to_numpy()] = pd.NaT
+        return out
+
+    raw = np.asarray(s, dtype=object)
+    out = _none_column(n)
+
+    # date / datetime / numeric cells (mixed XLSX columns) go through to_date itself
+    text = np.ones(n, dtype=bool)
+    if pd.api.types.infer_dtype(raw, skipna=True) not in ("string", "empty"):
+        text = np.fromiter((isinstance(v, str) for v in raw), dtype=bool, count=n)
+        out[~text] = [to_date(v) for v in raw[~text]]
+
+    rest = s if text.all() else pd.Series(raw[text], dtype=object)
+    codes, uniques, na = factorize_column(rest)
+    cleaned = _clean_strings(uniques)
+    present = pd.notna(cleaned)
+
+    parsed = _none_column(len(uniques))
+    if present.any():
+        distinct = cleaned[present]
+        guessed = _guess_date_format(distinct)
+        formats = [f for f in formats if is_month_first(f)] + ([guessed] if guessed and guessed not in formats else [])
+        parsed[present] = _parse_date_strings(distinct, formats)
+
+    out[text] = broadcast_distinct(parsed, to_date(na), codes)
+    return out
@@ -1,28 +1,226 @@
 import pandas as pd
 import numpy as np
-from sqlalchemy import text
-from backend.etl import get_engine
+from sqlalchemy import bindparam, text
+from backend.db import get_engine
+from backend.core.compact import compact_frame, memory_report
+from backend.core.mls_contract import CLASSIFIED_FIELDS
+from backend.core.rollups import ROLLUP_TABLE, read_rollups, supports_rollups
+from backend.core.silo_cache import get_silo_cache
+from backend.core.snapshot_store import get_snapshot_store
+
+GRID_COLUMNS = ["import_id", "snapshot_date", "asset_class", "status_raw", "status_group", "closed_type"] + [name for name, _, _ in CLASSIFIED_FIELDS]
+# sortable grid columns: each has an (import_id, asset_class, <col>, row_id) index in schema.sql
+GRID_SORTS = ("ml_number", "list_price", "close_price", "heated_area", "adom", "close_date")
+GRID_OPS = {"=": "=", "!=": "<>", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "like": "LIKE", "ilike": "ILIKE", "in": "IN"}
+
+def _grid_column(col):
+    if col not in GRID_COLUMNS:
+        raise ValueError(f"Unknown grid column '{col}'")
+    return col
+
+def _grid_where(import_id, asset_class, filters):
+    """WHERE clauses, params and expanding binds for a silo + {column: value | (op, value)} filters."""
+    where = ["import_id = :id"]
+    params = {"id": import_id}
+    binds = []
+    if asset_class is not None:
+        where.append("asset_class = :cls")
+        params["cls"] = asset_class
+
+    for i, (col, cond) in enumerate((filters or {}).items()):
+        op, value = cond if isinstance(cond, tuple) else ("=", cond)
+        if op not in GRID_OPS:
+            raise ValueError(f"Unknown filter operator '{op}'")
+        if value is None:
+            where.append(f"{_grid_column(col)} IS {'NOT ' if op == '!=' else ''}NULL")
+            continue
+        where.append(f"{_grid_column(col)} {GRID_OPS[op]} :f{i}")
+        params[f"f{i}"] = list(value) if op == "in" else value
+        if op == "in":
+            binds.append(bindparam(f"f{i}", expanding=True))
+    return where, params, binds
 
 class MarketReports:
     def __init__(self):
         self.engine = get_engine()
 
     def list_all_reports(self):
-        query = text("SELECT import_id, report_name, snapshot_date FROM public.stg_mls_imports ORDER BY imported_at DESC")
+        query = text("SELECT import_id, report_name, snapshot_date FROM public.stg_mls_imports WHERE status = 'complete' ORDER BY imported_at DESC")
         with self.engine.connect() as conn:
             return pd.read_sql(query, conn)
 
-    def load_report_data(self, import_id):
-        query = text("SELECT * FROM public.stg_mls_classified WHERE import_id = :id")
+    def _query_silo(self, import_id, asset_class=None):
+        store = get_snapshot_store()
+        if store is not None and store.has(import_id):
+            return store.read(import_id, asset_class)
+        if asset_class is None:
+            query = text("SELECT * FROM public.stg_mls_classified WHERE import_id = :id")
+            params = {"id": import_id}
+        else:
+            query = text("SELECT * FROM public.stg_mls_classified WHERE import_id = :id AND asset_class = :cls")
+            params = {"id": import_id, "cls": asset_class}
         with self.engine.connect() as conn:
-            return pd.read_sql(query, conn, params={"id": import_id})
+            return pd.read_sql(query, conn, params=params)
+
+    def load_report_data(self, import_id, asset_class=None, compact=False):
+        """
+        Loads one silo (optionally one asset class). Silos are immutable, so results are cached.
+        compact=True returns categorical / nullable-int / float32 / datetime columns (see backend/core/compact).
+        """
+        if compact:
+            return get_silo_cache().get_or_load(import_id, f"{asset_class or '*'}#compact", lambda: compact_frame(self._query_silo(import_id, asset_class)))
+        return get_silo_cache().get_or_load(import_id, asset_class or "*", lambda: self._query_silo(import_id, asset_class))
+
+    def memory_report(self, import_id, asset_class=None):
+        """Per-column memory of the silo as loaded today vs compact mode."""
+        return memory_report(self._query_silo(import_id, asset_class))
+
+    def query_snapshot(self, import_id, asset_class=None, columns=None, filters=None):
+        """
+        Local read of a committed silo from the snapshot store (SNAPSHOT_DIR):
+        only `columns` are read and `filters` are pushed into the parquet scan.
+        Falls back to Postgres when the silo has no snapshot.
+        """
+        store = get_snapshot_store()
+        if store is not None and store.has(import_id):
+            return store.read(import_id, asset_class, columns, filters)
+        where, params, binds = _grid_where(import_id, asset_class, filters)
+        select = ", ".join(_grid_column(c) for c in columns) if columns else "*"
+        query = text(f"SELECT {select} FROM public.stg_mls_classified WHERE {' AND '.join(where)}")
+        if binds:
+            query = query.bindparams(*binds)
+        with self.engine.connect() as conn:
+            return pd.read_sql(query, conn, params=params)
+
+    def cache_stats(self):
+        return get_silo_cache().stats()
+
+    def cached_silos(self):
+        """Rows / bytes of every frame currently held by the silo cache."""
+        return pd.DataFrame(get_silo_cache().entries())
+
+    def get_inventory_overview_sql(self, import_id, asset_class=None):
+        """Same columns as get_inventory_overview, from the silo rollups (raw rows if the silo has none)."""
+        rollup_query = text(f"""
+            SELECT zip AS "ZIP CODE",
+                   COALESCE(SUM(row_count) FILTER (WHERE status_group = 'listing'), 0) AS "Listings",
+                   COALESCE(SUM(row_count) FILTER (WHERE status_group = 'pending'), 0) AS "Pendings",
+                   COALESCE(SUM(row_count) FILTER (WHERE status_group = 'closed'), 0) AS "Sold",
+                   SUM(list_price_sum) / NULLIF(SUM(list_price_n), 0) AS "Avg_Price",
+                   SUM(heated_area_sum) / NULLIF(SUM(heated_area_n), 0) AS "Avg_Size"
+            FROM {ROLLUP_TABLE}
+            WHERE import_id = :id AND level = 'zip'
+              AND (CAST(:cls AS text) IS NULL OR asset_class = :cls)
+              AND zip IS NOT NULL
+            GROUP BY zip
+            ORDER BY zip
+        """)
+        raw_query = text("""
+            SELECT zip AS "ZIP CODE",
+                   COUNT(*) FILTER (WHERE status_group = 'listing') AS "Listings",
+                   COUNT(*) FILTER (WHERE status_group = 'pending') AS "Pendings",
+                   COUNT(*) FILTER (WHERE status_group = 'closed') AS "Sold",
+                   CAST(AVG(list_price) AS double precision) AS "Avg_Price",
+                   CAST(AVG(heated_area) AS double precision) AS "Avg_Size"
+            FROM public.stg_mls_classified
+            WHERE import_id = :id
+              AND (CAST(:cls AS text) IS NULL OR asset_class = :cls)
+              AND zip IS NOT NULL
+            GROUP BY zip
+            ORDER BY zip
+        """)
+        params = {"id": import_id, "cls": asset_class}
+        def load():
+            store = get_snapshot_store()
+            if store is not None and store.has(import_id):
+                return self.get_inventory_overview(store.read(import_id, asset_class, columns=['zip', 'status_group', 'list_price', 'heated_area']))
+            with self.engine.connect() as conn:
+                if supports_rollups(self.engine):
+                    df = pd.read_sql(rollup_query, conn, params=params)
+                    if not df.empty:
+                        return df
+                return pd.read_sql(raw_query, conn, params=params)
+        return get_silo_cache().get_or_load(import_id, f"{asset_class or '*'}#overview", load)
+
+    def get_rollups(self, import_id, asset_class=None, level="zip", zip_code=None):
+        """Precomputed per-silo aggregates (counts, sums, means, medians of price, price/sqft, DOM)."""
+        def load():
+            return read_rollups(self.engine, import_id, asset_class, level, zip_code)
+        if not supports_rollups(self.engine):
+            return pd.DataFrame()
+        return get_silo_cache().get_or_load(import_id, f"{asset_class or '*'}#rollups:{level}:{zip_code or '*'}", load)
+
+    def fetch_page(self, import_id, asset_class=None, filters=None, sort="ml_number", descending=False, after=None, page_size=200, columns=None):
+        """
+        One page of silo rows, keyset-paginated on (sort NULLS LAST, row_id).
+
+        filters: {column: value} or {column: (op, value)}, op in GRID_OPS ("in" takes a list).
+        sort:    one of GRID_SORTS, each backed by an (import_id, asset_class, sort, row_id) index.
+        after:   the "next" cursor of the previous page (None = first page).
+        Returns {"rows": DataFrame, "next": cursor or None}. No OFFSET and no
+        COUNT(*): the non-NULL range and the NULL tail are separate index
+        range scans, so a page costs the same wherever it is.
+        """
+        if sort not in GRID_SORTS:
+            raise ValueError(f"Unsupported grid sort '{sort}' (indexed: {list(GRID_SORTS)})")
+        # the cursor needs the sort column and row_id in every page
+        select = ", ".join(dict.fromkeys([*(_grid_column(c) for c in columns), sort, "row_id"])) if columns else "*"
+        direction, lt = ("DESC", "<") if descending else ("ASC", ">")
+        after_value, after_row = after if after is not None else (None, None)
+
+        def page(keyset, params, order, limit):
+            where, base, binds = _grid_where(import_id, asset_class, filters)
+            query = text(f"""
+                SELECT {select}
+                FROM public.stg_mls_classified
+                WHERE {' AND '.join(where + keyset)}
+                ORDER BY {order}
+                LIMIT :limit
+            """)
+            if binds:
+                query = query.bindparams(*binds)
+            with self.engine.connect() as conn:
+                return pd.read_sql(query, conn, params={**base, **params, "limit": int(limit)})
+
+        pages = []
+        if after is None or after_value is not None:
+            keyset, params = [f"{sort} IS NOT NULL"], {}
+            if after is not None:
+                keyset.append(f"({sort}, row_id) {lt} (:after_value, :after_row)")
+                params = {"after_value": after_value, "after_row": after_row}
+            pages.append(page(keyset, params, f"{sort} {direction}, row_id {direction}", page_size))
+            after_row = None  # the NULL tail, if reached, starts from its beginning
+        missing = page_size - sum(len(p) for p in pages)
+        if missing > 0:
+            keyset, params = [f"{sort} IS NULL"], {}
+            if after_row is not None:
+                keyset.append(f"row_id {lt} :after_row")
+                params = {"after_row": after_row}
+            pages.append(page(keyset, params, f"row_id {direction}", missing))
+
+        rows = pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0]
+        if len(rows) < page_size:
+            return {"rows": rows, "next": None}
+        last_value = rows[sort].iloc[-1]
+        last_value = None if pd.isna(last_value) else getattr(last_value, "item", lambda: last_value)()
+        return {"rows": rows, "next": (last_value, int(rows["row_id"].iloc[-1]))}
 
     def get_inventory_overview(self, df):
         if df.empty: return pd.DataFrame()
-        return df.groupby('zip').agg(
-            Listings=('status_group', lambda x: (x == 'listing').sum()),
-            Pendings=('status_group', lambda x: (x == 'pending').sum()),
-            Sold=('status_group', lambda x: (x == 'closed').sum()),
-            Avg_Price=('list_price', 'mean'),
-            Avg_Size=('heated_area', 'mean')
+        # boolean columns + builtin sums (no per-group Python lambdas)
+        status = df['status_group']
+        flags = pd.DataFrame({
+            'zip': df['zip'],
+            'Listings': (status == 'listing').astype('int64'),
+            'Pendings': (status == 'pending').astype('int64'),
+            'Sold': (status == 'closed').astype('int64'),
+            'Avg_Price': df['list_price'],
+            'Avg_Size': df['heated_area'],
+        })
+        return flags.groupby('zip').agg(
+            Listings=('Listings', 'sum'),
+            Pendings=('Pendings', 'sum'),
+            Sold=('Sold', 'sum'),
+            Avg_Price=('Avg_Price', 'mean'),
+            Avg_Size=('Avg_Size', 'mean')
         ).reset_index().rename(columns={'zip': 'ZIP CODE'})
@@ -0,0 +1,101 @@
+"""
+Silo rollups — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Materializar, quando um import termina, os agregados que os dashboards usam
+- Grão: import_id, asset_class, zip, subdivision, status_group
+  (+ linhas level='zip' com o total do ZIP, porque mediana não se soma)
+- Métricas: contagem, soma, média e mediana de preço, preço/sqft e DOM
+- Tudo calculado no Postgres (INSERT ... SELECT), nada passa pelo cliente
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+ROLLUP_TABLE = "public.mls_silo_rollups"
+
+# metric -> SQL expression over stg_mls_classified
+ROLLUP_METRICS: Dict[str, str] = {
+    "list_price": "list_price",
+    "close_price": "close_price",
+    # closed rows are priced by close_price, the rest by list_price
+    "price_sqft": "CASE WHEN heated_area > 0 THEN COALESCE(close_price, list_price) / heated_area END",
+    "dom": "adom",
+    "heated_area": "heated_area",
+}
+
+# subdivision: the MLS common name first, legal name otherwise
+SUBDIVISION_SQL = "COALESCE(subdivision_condo_name, legal_subdivision_name)"
+
+
+def supports_rollups(engine) -> bool:
+    # percentile_cont / GROUPING SETS
+    return engine.dialect.name == "postgresql"
+
+
+def _metric_columns() -> str:
+    cols = []
+    for m in ROLLUP_METRICS:
+        cols += [f"{m}_n", f"{m}_sum", f"{m}_mean", f"{m}_median"]
+    return ", ".join(cols)
+
+
+def _metric_aggregates() -> str:
+    aggs = []
+    for m in ROLLUP_METRICS:
+        aggs += [
+            f"COUNT({m})",
+            f"SUM({m})",
+            f"AVG({m})",
+            f"percentile_cont(0.5) WITHIN GROUP (ORDER BY {m})",
+        ]
+    return ",\n               ".join(aggs)
+
+
+def build_rollups(engine, import_id: str) -> int:
+    """(Re)builds the rollup rows of one silo. Returns the number of rollup rows."""
+    metrics = ",\n                   ".join(f"CAST({expr} AS double precision) AS {m}" for m, expr in ROLLUP_METRICS.items())
+    sql = f"""
+        INSERT INTO {ROLLUP_TABLE} (import_id, asset_class, level, zip, subdivision, status_group, row_count, {_metric_columns()})
+        SELECT import_id, asset_class,
+               CASE WHEN GROUPING(subdivision) = 1 THEN 'zip' ELSE 'subdivision' END,
+               zip, subdivision, status_group,
+               COUNT(*),
+               {_metric_aggregates()}
+        FROM (
+            SELECT import_id, asset_class, zip, status_group,
+                   {SUBDIVISION_SQL} AS subdivision,
+                   {metrics}
+            FROM public.stg_mls_classified
+            WHERE import_id = :id
+        ) s
+        GROUP BY GROUPING SETS (
+            (import_id, asset_class, zip, subdivision, status_group),
+            (import_id, asset_class, zip, status_group)
+        )
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {ROLLUP_TABLE} WHERE import_id = :id"), {"id": import_id})
+        return conn.execute(text(sql), {"id": import_id}).rowcount
+
+
+def read_rollups(
+    engine,
+    import_id: str,
+    asset_class: Optional[str] = None,
+    level: str = "zip",
+    zip_code: Optional[str] = None,
+) -> pd.DataFrame:
+    query = text(f"""
+        SELECT * FROM {ROLLUP_TABLE}
+        WHERE import_id = :id AND level = :level
+          AND (CAST(:cls AS text) IS NULL OR asset_class = :cls)
+          AND (CAST(:zip AS text) IS NULL OR zip = :zip)
+        ORDER BY zip, subdivision, status_group
+    """)
+    with engine.connect() as conn:
+        return pd.read_sql(query, conn, params={"id": import_id, "level": level, "cls": asset_class, "zip": zip_code})
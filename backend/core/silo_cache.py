@@ -0,0 +1,171 @@
+"""
+Silo cache — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Guardar em memória os DataFrames de silos já carregados, por (import_id, asset_class)
+- Um silo não muda depois que run_batch_etl termina, então não há TTL:
+  só limite de memória com despejo LRU
+- Compartilhado por todas as sessões do processo (singleton)
+- Opcional: espelhar cada silo em parquet local (SILO_CACHE_DIR) para
+  um servidor reiniciado aquecer sem ir ao banco
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+Key = Tuple[str, str]
+
+# SILO_CACHE_MAX_MB   memory bound for cached frames      (default 512)
+# SILO_CACHE_DIR      spill directory, unset = memory only
+DEFAULT_MAX_MB = 512
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class SiloCache:
+    def __init__(self, max_bytes: int, spill_dir: Optional[str | Path] = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self._lock = threading.Lock()
+        self._frames: "OrderedDict[Key, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "spill_errors": 0}
+
+    # --- public API ---
+    def get_or_load(self, import_id: str, asset_class: str, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Returns the cached silo frame, loading it (disk spill first, then
+        `loader`) on a miss. Callers get a shallow copy: adding or dropping
+        columns never touches the shared frame.
+        """
+        key = (str(import_id), str(asset_class))
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is not None:
+                self._frames.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0].copy(deep=False)
+            self._stats["misses"] += 1
+
+        df = self._read_spill(key)
+        if df is not None:
+            with self._lock:
+                self._stats["disk_hits"] += 1
+        else:
+            df = loader()
+            self._write_spill(key, df)
+
+        self._put(key, df)
+        return df.copy(deep=False)
+
+    def invalidate(self, import_id: str) -> None:
+        """Drops every asset_class of a silo (memory and spill)."""
+        import_id = str(import_id)
+        with self._lock:
+            for key in [k for k in self._frames if k[0] == import_id]:
+                self._bytes -= self._frames.pop(key)[1]
+        if self.spill_dir and self.spill_dir.exists():
+            for path in self.spill_dir.glob(f"{self._safe(import_id)}__*.parquet"):
+                path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                hit_rate=round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                entries=len(self._frames),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+            )
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Memory report: one row per cached frame, most recently used last."""
+        with self._lock:
+            return [
+                {"import_id": k[0], "asset_class": k[1], "rows": len(df), "columns": df.shape[1], "bytes": size}
+                for k, (df, size) in self._frames.items()
+            ]
+
+    # --- internals ---
+    def _put(self, key: Key, df: pd.DataFrame) -> None:
+        size = _frame_bytes(df)
+        if size > self.max_bytes:
+            return  # never cache a silo larger than the whole budget
+
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            while self._frames and self._bytes + size > self.max_bytes:
+                _, (_, evicted) = self._frames.popitem(last=False)
+                self._bytes -= evicted
+                self._stats["evictions"] += 1
+            self._frames[key] = (df, size)
+            self._bytes += size
+
+    @staticmethod
+    def _safe(part: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", part)
+
+    def _spill_path(self, key: Key) -> Optional[Path]:
+        if not self.spill_dir:
+            return None
+        return self.spill_dir / f"{self._safe(key[0])}__{self._safe(key[1])}.parquet"
+
+    def _read_spill(self, key: Key) -> Optional[pd.DataFrame]:
+        path = self._spill_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            with self._lock:
+                self._stats["spill_errors"] += 1
+            return None
+
+    def _write_spill(self, key: Key, df: pd.DataFrame) -> None:
+        path = self._spill_path(key)
+        if path is None:
+            return
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            with self._lock:
+                self._stats["spill_errors"] += 1
+
+
+# =========================================================
+# Process-wide instance
+# =========================================================
+
+_lock = threading.Lock()
+_cache: Optional[SiloCache] = None
+
+
+def get_silo_cache() -> SiloCache:
+    global _cache
+    with _lock:
+        if _cache is None:
+            max_mb = int(os.getenv("SILO_CACHE_MAX_MB", DEFAULT_MAX_MB))
+            _cache = SiloCache(max_mb << 20, os.getenv("SILO_CACHE_DIR") or None)
+        return _cache
@@ -0,0 +1,184 @@
+"""
+Local snapshot store — Market Lens (Cloud-first)
+
+Responsabilidade:
+- Persistir cada silo commitado em parquet comprimido (zstd), particionado
+  por import_id / asset_class (layout hive):
+    <SNAPSHOT_DIR>/import_id=<id>/asset_class=<cls>/part-0.parquet
+- Ler localmente com memory-map, projeção de colunas e filtro por predicado
+- O Postgres continua sendo o sistema de registro: o store é só uma cópia
+  de leitura, escrita depois do commit e descartável a qualquer momento
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+from sqlalchemy import text
+
+from backend.core.compact import COLUMN_KINDS
+
+# SNAPSHOT_DIR   root of the store, unset = disabled
+SNAPSHOT_CHUNK_ROWS = 50_000
+SNAPSHOT_FILTER_OPS = frozenset(["=", "!=", "<", "<=", ">", ">=", "in"])
+
+_DONE = "_SUCCESS"
+
+
+def _arrow_type(column: str):
+    import pyarrow as pa
+
+    kind = COLUMN_KINDS.get(column)
+    if kind == "numeric":
+        return pa.float64()
+    if kind == "date":
+        return pa.date32()
+    if column in ("row_id", "row_hash"):
+        return pa.int64()
+    return pa.string()
+
+
+def _arrow_chunk(df: pd.DataFrame, schema):
+    import pyarrow as pa
+
+    df = df.copy()
+    for field in schema:
+        s = df[field.name]
+        if pa.types.is_floating(field.type) or pa.types.is_integer(field.type):
+            # Postgres numeric arrives as Decimal
+            df[field.name] = pd.to_numeric(s, errors="coerce")
+            if pa.types.is_integer(field.type):
+                df[field.name] = df[field.name].astype("Int64")
+        elif pa.types.is_date(field.type):
+            df[field.name] = pd.to_datetime(s, errors="coerce").dt.date
+        else:
+            df[field.name] = s.astype(object).where(s.notna(), None).map(lambda v: v if v is None else str(v))
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def _arrow_filters(filters: Optional[Dict[str, Any]]) -> Optional[List[tuple]]:
+    if not filters:
+        return None
+    out = []
+    for col, cond in filters.items():
+        op, value = cond if isinstance(cond, tuple) else ("=", cond)
+        if op not in SNAPSHOT_FILTER_OPS:
+            raise ValueError(f"Unsupported snapshot filter operator '{op}'")
+        out.append((col, "==" if op == "=" else op, list(value) if op == "in" else value))
+    return out
+
+
+class SnapshotStore:
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def silo_dir(self, import_id: str) -> Path:
+        return self.root / f"import_id={import_id}"
+
+    def has(self, import_id: str) -> bool:
+        return (self.silo_dir(import_id) / _DONE).exists()
+
+    def write_silo(self, engine, import_id: str, chunk_rows: int = SNAPSHOT_CHUNK_ROWS) -> int:
+        """
+        Streams a committed silo out of Postgres into the store.
+        Written to a temp dir and renamed, so readers never see a partial silo.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tmp = self.root / f".tmp-{uuid.uuid4().hex}"
+        writers: Dict[str, Any] = {}
+        rows = 0
+        try:
+            query = text("SELECT * FROM public.stg_mls_classified WHERE import_id = :id ORDER BY asset_class, row_id")
+            with engine.connect() as conn:
+                for chunk in pd.read_sql(query, conn, params={"id": import_id}, chunksize=chunk_rows):
+                    for asset_class, part in chunk.groupby("asset_class", sort=False, dropna=False):
+                        part = part.drop(columns=["import_id", "asset_class"])
+                        key = str(asset_class)
+                        if key not in writers:
+                            schema = pa.schema([(c, _arrow_type(c)) for c in part.columns])
+                            path = tmp / f"asset_class={key}" / "part-0.parquet"
+                            path.parent.mkdir(parents=True, exist_ok=True)
+                            writers[key] = pq.ParquetWriter(path, schema, compression="zstd")
+                        writers[key].write_table(_arrow_chunk(part, writers[key].schema))
+                        rows += len(part)
+            for w in writers.values():
+                w.close()
+            writers.clear()
+            (tmp / _DONE).write_text(str(rows))
+
+            final = self.silo_dir(import_id)
+            if final.exists():
+                shutil.rmtree(final)
+            os.replace(tmp, final)
+            return rows
+        finally:
+            for w in writers.values():
+                w.close()
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def read(
+        self,
+        import_id: str,
+        asset_class: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> pd.DataFrame:
+        """
+        Memory-mapped read of one silo with column projection and predicate
+        pushdown (row groups that cannot match are skipped).
+        filters: {column: value} or {column: (op, value)}, op in SNAPSHOT_FILTER_OPS.
+        """
+        import pyarrow.parquet as pq
+
+        # import_id / asset_class live in the directory names, not in the files
+        wanted = list(columns) if columns else None
+        file_columns = [c for c in wanted if c not in ("import_id", "asset_class")] if wanted else None
+        if file_columns is not None and asset_class is None and "asset_class" in wanted:
+            file_columns.append("asset_class")  # hive partition column
+
+        path = self.silo_dir(import_id)
+        if asset_class is not None:
+            path = path / f"asset_class={asset_class}"
+        if not path.exists():
+            return pd.DataFrame(columns=wanted or [])
+
+        df = pq.read_table(
+            path,
+            columns=file_columns,
+            filters=_arrow_filters(filters),
+            memory_map=True,
+            partitioning="hive",
+        ).to_pandas()
+
+        if "asset_class" in df.columns:
+            df["asset_class"] = df["asset_class"].astype(str)
+        elif not wanted or "asset_class" in wanted:
+            df.insert(0, "asset_class", asset_class)
+        if not wanted or "import_id" in wanted:
+            df.insert(0, "import_id", import_id)
+        return df[wanted] if wanted else df
+
+    def drop(self, import_id: str) -> None:
+        shutil.rmtree(self.silo_dir(import_id), ignore_errors=True)
+
+
+_lock = threading.Lock()
+_stores: Dict[str, SnapshotStore] = {}
+
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    root = os.getenv("SNAPSHOT_DIR")
+    if not root:
+        return None
+    with _lock:
+        if root not in _stores:
+            _stores[root] = SnapshotStore(root)
+        return _stores[root]
@@ -1,62 +1,528 @@
 from __future__ import annotations
-import hashlib, json, os, tempfile, uuid
+import functools, hashlib, io, itertools, json, multiprocessing, os, shutil, tempfile, uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date
 from pathlib import Path
 import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, text
-
-def get_engine():
-    url = os.getenv("DATABASE_URL") or os.getenv("SUPABASE_DB_URL")
-    if url and url.startswith("postgres://"):
-        url = url.replace("postgres://", "postgresql://", 1)
-    return create_engine(url, pool_pre_ping=True)
-
-def _clean_numeric(val):
-    if pd.isna(val): return None
-    if isinstance(val, str):
-        v = val.replace('$', '').replace(',', '').strip()
-        try: return float(v)
-        except: return None
-    return val
-
-def run_batch_etl(files_data, report_name, snapshot_date):
+from sqlalchemy import bindparam, text
+
+from backend.core.comps import CompsEngine
+from backend.core.etl_metrics import StageMetrics, log_event, summarize
+from backend.core.normalization import to_numeric_column
+from backend.core.rollups import build_rollups, supports_rollups
+from backend.core.silo_cache import get_silo_cache
+from backend.core.snapshot_store import get_snapshot_store
+from backend.db import get_engine  # process-wide pooled engine
+
+def supports_copy(engine):
+    return engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+def insert_rows(conn, df, table="public.stg_mls_classified"):
+    """Portable path: executemany of a parameterized INSERT."""
+    records = df.replace({np.nan: None}).to_dict(orient="records")
+    if records:
+        cols, vals = ", ".join(df.columns), ", ".join([f":{c}" for c in df.columns])
+        conn.execute(text(f"INSERT INTO {table} ({cols}) VALUES ({vals})"), records)
+    return len(records)
+
+def copy_rows(conn, df, table="public.stg_mls_classified"):
+    """Postgres path: stream the frame as CSV through COPY FROM STDIN (psycopg2)."""
+    if df.empty: return 0
+    out = df.copy()
+    # integral float columns go out as ints so COPY can load them into integer columns
+    for c in out.columns:
+        if out[c].dtype.kind == "f":
+            v = out[c].dropna()
+            if ((v == np.floor(v)) & (v.abs() < 2**53)).all():
+                out[c] = out[c].astype("Int64")
+    buf = io.StringIO()
+    out.to_csv(buf, index=False, header=False, na_rep="\\N")
+    buf.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
     try:
-        from backend.contract.mls_classify import classify_xlsx
-        engine = get_engine()
-        import_id = str(uuid.uuid4())
-        
-        # 1. Create the Silo Header
+        cursor.copy_expert(f"COPY {table} ({', '.join(out.columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf)
+    finally:
+        cursor.close()
+    return len(out)
+
+def _row_hashes(df_cls):
+    """Content hash per classified row (silo-independent columns only), as signed bigint."""
+    content = df_cls.drop(columns=["snapshot_date", "asset_class", "import_id", "file_sha256"], errors="ignore")
+    return pd.util.hash_pandas_object(content.astype(str), index=False).to_numpy().view("int64")
+
+def prepare_classified(df_cls, import_id, category, file_sha256=None, row_hashes=False):
+    if row_hashes:
+        df_cls["row_hash"] = _row_hashes(df_cls)
+    df_cls["import_id"] = import_id
+    df_cls["asset_class"] = category # Strictly 'Properties', 'Land', or 'Rental'
+    if file_sha256:
+        df_cls["file_sha256"] = file_sha256
+
+    # Numeric Cleaning: classify_frame already parsed these (object float/None), only the dtype is left
+    num_cols = ['list_price', 'close_price', 'beds', 'full_baths', 'heated_area', 'tax', 'adom', 'cdom']
+    for c in [col for col in num_cols if col in df_cls.columns and df_cls[col].dtype.kind != "f"]:
+        df_cls[c] = to_numeric_column(df_cls[c]).astype(float)
+    return df_cls
+
+def _checkpoint(conn, import_id, file_sha256, chunk, rows):
+    """Chunk checkpoint, written in the same transaction as the chunk's rows."""
+    conn.execute(text("""
+        INSERT INTO public.stg_mls_import_chunks (import_id, file_sha256, chunk_index, chunk_rows, row_count)
+        VALUES (:id, :sha, :i, :size, :rows)
+    """), {"id": import_id, "sha": file_sha256, "i": chunk[0], "size": chunk[1], "rows": rows})
+
+def _load_classified(engine, df_cls, import_id, category, file_sha256=None, row_hashes=False, metrics=None, chunk=None, rejects=None):
+    """chunk=(index, chunk_rows) records a checkpoint atomically with the rows, and so do the chunk's rejects."""
+    metrics = metrics or StageMetrics(trace_memory=False)
+    with metrics.stage("clean", rows=len(df_cls)):
+        df_cls = prepare_classified(df_cls, import_id, category, file_sha256, row_hashes)
+
+    # COPY on Postgres/psycopg2, executemany everywhere else
+    with metrics.stage("load", rows=len(df_cls)):
         with engine.begin() as conn:
-            conn.execute(text("""
-                INSERT INTO public.stg_mls_imports (import_id, report_name, source_file, source_tag, snapshot_date) 
-                VALUES (:id, :name, 'Batch Upload', 'MLS', :d)
-            """), {"id": import_id, "name": report_name, "d": snapshot_date})
-
-        for item in files_data:
-            f, category = item['file'], item['type']
-            ext = Path(f.name).suffix.lower()
-            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
+            rows = copy_rows(conn, df_cls) if supports_copy(engine) else insert_rows(conn, df_cls)
+            if rejects is not None:
+                insert_rows(conn, rejects, table="public.stg_mls_rejects")
+            if chunk is not None:
+                _checkpoint(conn, import_id, file_sha256, chunk, rows)
+            return rows
+
+CONTRACT_PATH = Path("backend/contract/mls_column_contract.yaml")
+
+def _spool_upload(f, metrics=None):
+    metrics = metrics or StageMetrics(trace_memory=False)
+    ext = Path(f.name).suffix.lower()
+    with metrics.stage("spool"):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
+            try:
                 tmp.write(f.getbuffer())
-                path = tmp.name
+            except BaseException:
+                tmp.close()
+                os.remove(tmp.name)
+                raise
+            return tmp.name
+
+def _chunk_size(path, chunk_rows):
+    """Rows per chunk this file is actually split into (0 = XLSX in one piece)."""
+    from backend.core.mls_reader import DEFAULT_CHUNK_ROWS, detect_format
+    return chunk_rows or (DEFAULT_CHUNK_ROWS if detect_format(path) == "csv" else 0)
+
+def _read_whole_xlsx(path):
+    yield pd.read_excel(path, engine="openpyxl")
+
+def _classify_chunks(path, snapshot_date, chunk_rows, metrics=None, skip=0, on_reject=None):
+    from backend.contract.mls_classify import classify_chunks, load_contract
+    from backend.core.mls_reader import DEFAULT_CHUNK_ROWS, detect_format, iter_file_chunks
+
+    # CSV always streams; XLSX whole file or streamed chunks
+    contract = load_contract(CONTRACT_PATH)
+    size = 0
+    if chunk_rows or detect_format(path) == "csv":
+        size = chunk_rows or DEFAULT_CHUNK_ROWS
+        chunks = iter_file_chunks(Path(path), chunk_rows=size, dtypes=contract.reader_dtypes)
+    else:
+        chunks = _read_whole_xlsx(path)
+    if skip:
+        # resumed file: committed chunks are read past, never classified again
+        chunks = itertools.islice(chunks, skip, None)
+    classify = functools.partial(classify_chunks, contract=contract, snapshot_date=snapshot_date or date.today(),
+                                 on_reject=on_reject, first_row=skip * size)
+    if metrics is None:
+        return classify(chunks)
+    # the classifier pulls from the reader: nested stages keep read time out of classify
+    return metrics.timed_iter("classify", classify(metrics.timed_iter("read", chunks)))
+
+def _classify_to_spool(path, snapshot_date, chunk_rows, spool_dir, skip=0, quarantine=False):
+    """
+    Process-pool worker: classifies one file (from chunk `skip` on) and
+    pickles each chunk into spool_dir as (classified, rejects or None).
+    """
+    from backend.core.mls_reader import DEFAULT_CHUNK_ROWS
+
+    metrics = StageMetrics()
+    chunk_paths, pending = [], []
+    chunks = _classify_chunks(path, snapshot_date, chunk_rows or DEFAULT_CHUNK_ROWS, metrics, skip, pending.append if quarantine else None)
+    for i, df_cls in enumerate(chunks, start=skip):
+        chunk_path = os.path.join(spool_dir, f"{i:05d}.pkl")
+        with metrics.stage("spool_write", rows=len(df_cls)):
+            pd.to_pickle((df_cls, _drain_rejects(pending)), chunk_path)
+        chunk_paths.append(chunk_path)
+    return chunk_paths, metrics.as_dict()
+
+def _drain_rejects(pending):
+    """The rejects split off the chunk just classified (on_reject appends them before it is yielded)."""
+    if not pending:
+        return None
+    rejects = pd.concat(pending, ignore_index=True)
+    pending.clear()
+    return rejects
+
+def _tag_rejects(rejects, item, import_id):
+    if rejects is None:
+        return None
+    return rejects.assign(import_id=import_id, file_sha256=item['sha256'], file_name=item['file'].name, asset_class=item['type'])
+
+def _file_sha256(f):
+    return hashlib.sha256(f.getbuffer()).hexdigest()
+
+def _classified_columns():
+    from backend.core.mls_contract import CLASSIFIED_FIELDS
+    return ["snapshot_date", "asset_class", "status_raw", "status_group", "closed_type"] + [name for name, _, _ in CLASSIFIED_FIELDS]
+
+def _find_ingested(engine, sha):
+    """Latest import that already holds this exact file content, or None."""
+    with engine.connect() as conn:
+        row = conn.execute(text("""
+            SELECT import_id, row_count FROM public.stg_mls_import_files
+            WHERE file_sha256 = :sha ORDER BY imported_at DESC LIMIT 1
+        """), {"sha": sha}).fetchone()
+    return (str(row[0]), row[1]) if row else None
+
+def _find_landed(engine, import_id, sha):
+    """Row count of a file this silo already finished (resume), or None."""
+    with engine.connect() as conn:
+        row = conn.execute(text("""
+            SELECT row_count FROM public.stg_mls_import_files WHERE import_id = :id AND file_sha256 = :sha
+        """), {"id": import_id, "sha": sha}).fetchone()
+    return row[0] if row else None
+
+def _has_chunks(engine, import_id, sha):
+    """True when this silo already committed chunks of the file (a resume continues them)."""
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT COUNT(*) FROM public.stg_mls_import_chunks WHERE import_id = :id AND file_sha256 = :sha
+        """), {"id": import_id, "sha": sha}).scalar() > 0
+
+def _resume_point(engine, import_id, sha, chunk_size):
+    """
+    (chunks, rows, rejected) already committed for a file of this silo. A
+    file that was chunked differently than now is dropped and starts over.
+    """
+    params = {"id": import_id, "sha": sha}
+    with engine.connect() as conn:
+        chunks, rows, sizes_lo, sizes_hi = conn.execute(text("""
+            SELECT COUNT(*), COALESCE(SUM(row_count), 0), MIN(chunk_rows), MAX(chunk_rows) FROM public.stg_mls_import_chunks
+            WHERE import_id = :id AND file_sha256 = :sha
+        """), params).fetchone()
+        if chunks and sizes_lo == sizes_hi == chunk_size:
+            # rejects only ever commit together with their chunk
+            rejected = conn.execute(text("SELECT COUNT(*) FROM public.stg_mls_rejects WHERE import_id = :id AND file_sha256 = :sha"), params).scalar()
+            return chunks, rows, rejected
+    if not chunks:
+        return 0, 0, 0
+    with engine.begin() as conn:
+        for table in ("stg_mls_classified", "stg_mls_rejects", "stg_mls_import_chunks"):
+            conn.execute(text(f"DELETE FROM public.{table} WHERE import_id = :id AND file_sha256 = :sha"), params)
+    return 0, 0, 0
+
+def _drop_stale_files(engine, import_id, shas):
+    """
+    Resume with a different set of files: everything the failed run
+    committed for files no longer in the batch goes, in one transaction.
+    """
+    with engine.begin() as conn:
+        for table in ("stg_mls_classified", "stg_mls_rejects", "stg_mls_import_chunks", "stg_mls_import_files"):
+            query = text(f"DELETE FROM public.{table} WHERE import_id = :id AND file_sha256 NOT IN :shas")
+            conn.execute(query.bindparams(bindparam("shas", expanding=True)), {"id": import_id, "shas": sorted(shas)})
+
+def _link_file(engine, src_import_id, import_id, category, sha, snapshot_date):
+    """Copies an already-classified file (and its quarantined rows) into this silo server-side; (rows, rejected)."""
+    overrides = {"snapshot_date": ":d", "asset_class": ":cls"}
+    cols = _classified_columns()
+    select = ", ".join(overrides.get(c, c) for c in cols)
+    with engine.begin() as conn:
+        res = conn.execute(text(f"""
+            INSERT INTO public.stg_mls_classified ({", ".join(cols)}, import_id, file_sha256, row_hash)
+            SELECT {select}, :id, file_sha256, row_hash FROM public.stg_mls_classified
+            WHERE import_id = :src AND file_sha256 = :sha
+        """), {"d": snapshot_date, "cls": category, "id": import_id, "src": src_import_id, "sha": sha})
+        rejected = conn.execute(text("""
+            INSERT INTO public.stg_mls_rejects (import_id, file_sha256, file_name, asset_class, row_number, status_raw, reason, raw_row)
+            SELECT :id, file_sha256, file_name, :cls, row_number, status_raw, reason, raw_row FROM public.stg_mls_rejects
+            WHERE import_id = :src AND file_sha256 = :sha
+        """), {"cls": category, "id": import_id, "src": src_import_id, "sha": sha})
+    return res.rowcount, rejected.rowcount
 
-            # 2. Run Classification logic
-            df_cls = classify_xlsx(xlsx_path=Path(path), contract_path=Path("backend/contract/mls_column_contract.yaml"), snapshot_date=snapshot_date)
-            df_cls["import_id"] = import_id
-            df_cls["asset_class"] = category # Strictly 'Properties', 'Land', or 'Rental'
+def _record_file(engine, import_id, item, rows, reused_from=None):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO public.stg_mls_import_files (import_id, file_name, file_sha256, asset_class, row_count, reused_from)
+            VALUES (:id, :name, :sha, :cls, :rows, :src)
+        """), {"id": import_id, "name": item['file'].name, "sha": item['sha256'], "cls": item['type'], "rows": rows, "src": reused_from})
 
-            # 3. Numeric Cleaning
-            num_cols = ['list_price', 'close_price', 'beds', 'full_baths', 'heated_area', 'tax', 'adom', 'cdom']
-            for c in [col for col in num_cols if col in df_cls.columns]:
-                df_cls[c] = df_cls[c].apply(_clean_numeric)
+def _file_result(item, rows, reused_from=None, duplicate_of=None, metrics=None, resumed_rows=0, rejected_rows=0):
+    return {"file": item['file'].name, "type": item['type'], "rows": rows, "sha256": item['sha256'],
+            "reused_from": reused_from, "duplicate_of": duplicate_of, "resumed_rows": resumed_rows,
+            "rejected_rows": rejected_rows, "stages": metrics.as_dict() if metrics else {}}
 
-            records = df_cls.replace({np.nan: None}).to_dict(orient="records")
-            if records:
-                cols, vals = ", ".join(df_cls.columns), ", ".join([f":{c}" for c in df_cls.columns])
+def _notify(progress, **fields):
+    if progress: progress(**fields)
+
+def _log_file(import_id, res):
+    log_event("etl_file", import_id=import_id, file=res['file'], type=res['type'], rows=res['rows'], rejected_rows=res['rejected_rows'],
+              reused_from=res['reused_from'], duplicate_of=res['duplicate_of'], stages=res['stages'])
+    return res
+
+def _run_file(engine, item, import_id, snapshot_date, chunk_rows, row_hashes=False, progress=None, metrics=None, quarantine=False):
+    f, category = item['file'], item['type']
+    metrics = metrics or StageMetrics()
+    path = _spool_upload(f, metrics)
+    try:
+        size = _chunk_size(path, chunk_rows)
+        skip, resumed, rejected = _resume_point(engine, import_id, item['sha256'], size)
+        # Clean + insert (+ checkpoint, + rejects) each chunk before reading the next
+        rows, parsed, pending = resumed, 0, []
+        chunks = _classify_chunks(path, snapshot_date, size or None, metrics, skip, pending.append if quarantine else None)
+        for i, df_cls in enumerate(chunks, start=skip):
+            rejects = _tag_rejects(_drain_rejects(pending), item, import_id)
+            rejected += 0 if rejects is None else len(rejects)
+            parsed += len(df_cls)
+            _notify(progress, status="loading", rows_parsed=parsed, rows_inserted=rows, rows_rejected=rejected)
+            rows += _load_classified(engine, df_cls, import_id, category, item['sha256'], row_hashes, metrics, chunk=(i, size), rejects=rejects)
+            _notify(progress, status="loading", rows_parsed=parsed, rows_inserted=rows, rows_rejected=rejected)
+    finally:
+        os.remove(path)
+    with metrics.stage("record"):
+        _record_file(engine, import_id, item, rows)
+    _notify(progress, status="done", rows_parsed=parsed, rows_inserted=rows, rows_rejected=rejected)
+    return _log_file(import_id, _file_result(item, rows, metrics=metrics, resumed_rows=resumed, rejected_rows=rejected))
+
+def _run_parallel(engine, files_data, import_id, snapshot_date, chunk_rows, workers, row_hashes=False, progress=None, file_metrics=None, quarantine=False):
+    """Classifies files in a process pool; this process stays the single DB writer."""
+    from backend.core.mls_reader import DEFAULT_CHUNK_ROWS
+
+    progress = progress or [None] * len(files_data)
+    file_metrics = file_metrics or [StageMetrics() for _ in files_data]
+    size = chunk_rows or DEFAULT_CHUNK_ROWS
+    paths, spools, resume = [], [], []
+    results = [None] * len(files_data)
+    try:
+        # spooled inside the try: a failing upload never leaks the ones before it
+        for item, m in zip(files_data, file_metrics):
+            paths.append(_spool_upload(item['file'], m))
+            spools.append(tempfile.mkdtemp(prefix="mls_spool_"))
+            resume.append(_resume_point(engine, import_id, item['sha256'], size))
+
+        # spawn: never fork a (multi-threaded) Streamlit server process
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(files_data)), mp_context=ctx) as pool:
+            futures = {
+                pool.submit(_classify_to_spool, path, snapshot_date, size, spool, resume[i][0], quarantine): i
+                for i, (path, spool) in enumerate(zip(paths, spools))
+            }
+            try:
+                # load each file as soon as its worker finishes
+                for fut in as_completed(futures):
+                    i = futures[fut]
+                    item, metrics = files_data[i], file_metrics[i]
+                    chunk_paths, worker_stages = fut.result()
+                    metrics.merge(worker_stages)
+                    parsed = worker_stages.get("classify", {}).get("rows", 0)
+                    skip, rows, rejected = resume[i]
+                    for n, chunk_path in enumerate(chunk_paths, start=skip):
+                        with metrics.stage("spool_read") as entry:
+                            df_cls, rejects = pd.read_pickle(chunk_path)
+                            entry["rows"] += len(df_cls)
+                        rejects = _tag_rejects(rejects, item, import_id)
+                        rejected += 0 if rejects is None else len(rejects)
+                        rows += _load_classified(engine, df_cls, import_id, item['type'], item['sha256'], row_hashes, metrics, chunk=(n, size), rejects=rejects)
+                        os.remove(chunk_path)
+                        _notify(progress[i], status="loading", rows_parsed=parsed, rows_inserted=rows, rows_rejected=rejected)
+                    with metrics.stage("record"):
+                        _record_file(engine, import_id, item, rows)
+                    results[i] = _log_file(import_id, _file_result(item, rows, metrics=metrics, resumed_rows=resume[i][1], rejected_rows=rejected))
+                    _notify(progress[i], status="done", rows_parsed=parsed, rows_inserted=rows, rows_rejected=rejected)
+            except BaseException:
+                for fut in futures: fut.cancel()
+                raise
+    finally:
+        for path in paths: os.remove(path)
+        for spool in spools: shutil.rmtree(spool, ignore_errors=True)
+    return results
+
+def run_batch_etl(files_data, report_name, snapshot_date, chunk_rows=None, workers=None, dedupe=True, row_hashes=False, progress=None, resume_import_id=None,
+                  validate=True, quarantine=False):
+    """
+    chunk_rows=None classifies each file in one piece; with chunk_rows set,
+    files are streamed in blocks of that many rows and every block is
+    inserted before the next one is read (flat memory on big uploads).
+
+    workers > 1 classifies the files in a process pool (always chunked);
+    inserts stay serialized in this process under the same import_id.
+
+    Every file is fingerprinted (sha256) and recorded in stg_mls_import_files.
+    With dedupe, content ingested before is linked server-side from the
+    earlier silo instead of being parsed again, and a file repeated inside
+    the batch is loaded once. row_hashes also stores a per-row content hash.
+
+    On Postgres the silo rollups (backend/core/rollups) are built once
+    every file has landed.
+
+    Every stage is timed per file (backend/core/etl_metrics): wall time,
+    rows/sec and memory (traced peak, process-wide RSS high-water mark)
+    land in each file's "stages", the batch totals in result["metrics"],
+    the "market_lens.etl" log and stg_mls_imports.etl_metrics.
+
+    progress(file_index, **fields) is called as the batch advances:
+    file_index None carries import_id, otherwise status ("loading",
+    "done", "reused", "duplicate"), rows_parsed and rows_inserted of that
+    file (backend/core/etl_jobs runs batches in the background with it).
+
+    Every chunk commits together with its checkpoint in stg_mls_import_chunks
+    and the header stays status='loading' until every file has landed
+    ('complete'; 'failed' on error). A failed batch is resumed by passing
+    its import_id as resume_import_id: finished files are skipped, a
+    partial file restarts after its last committed chunk, and whatever was
+    committed for a file left out of the resumed batch (e.g. replaced by a
+    corrected export) is deleted.
+
+    validate runs backend/core/mls_validation before anything is written:
+    headers vs. the contract and the upload type, and (CSV) every distinct
+    Status vs. status_rules. A failing file fails the batch with its report
+    in result["validation"] and no silo is created. With quarantine, rows
+    with a missing / unmapped Status go to stg_mls_rejects (committed with
+    their chunk) instead of failing the file; counts in "rejected_rows".
+    """
+    import_id, loading = resume_import_id, False
+    report = (lambda i: functools.partial(progress, i)) if progress else (lambda i: None)
+    try:
+        engine = get_engine()
+
+        # 0. Fail fast: headers and statuses are checked before the silo exists
+        file_metrics = [StageMetrics() for _ in files_data]
+        validation = []
+        if validate:
+            from backend.contract.mls_classify import load_contract
+            from backend.core.mls_validation import prevalidate
+
+            contract = load_contract(CONTRACT_PATH)
+            for item, metrics in zip(files_data, file_metrics):
+                with metrics.stage("validate"):
+                    validation.append(prevalidate(item['file'].getbuffer(), item['file'].name, contract, item['type'], quarantine))
+            errors = [e for v in validation for e in v.errors]
+            if errors:
+                return {"ok": False, "error": "; ".join(errors), "import_id": resume_import_id,
+                        "validation": [v.as_dict() for v in validation]}
+
+        # 1. Create the Silo Header (or pick up the one being resumed)
+        if resume_import_id:
+            with engine.connect() as conn:
+                header = conn.execute(text("SELECT snapshot_date, status FROM public.stg_mls_imports WHERE import_id = :id"), {"id": import_id}).fetchone()
+            if header is None:
+                raise ValueError(f"Unknown import '{import_id}'")
+            if header[1] == 'complete':
+                raise ValueError(f"Import '{import_id}' is already complete")
+            snapshot_date = header[0]
+            with engine.begin() as conn:
+                conn.execute(text("UPDATE public.stg_mls_imports SET status = 'loading' WHERE import_id = :id"), {"id": import_id})
+        else:
+            import_id = str(uuid.uuid4())
+            with engine.begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO public.stg_mls_imports (import_id, report_name, source_file, source_tag, snapshot_date, status)
+                    VALUES (:id, :name, 'Batch Upload', 'MLS', :d, 'loading')
+                """), {"id": import_id, "name": report_name, "d": snapshot_date})
+        loading = True
+        _notify(report(None), import_id=import_id)
+
+        # 2. Fingerprint; reuse content we already classified
+        items = []
+        for item, metrics in zip(files_data, file_metrics):
+            with metrics.stage("hash"):
+                items.append(dict(item, sha256=_file_sha256(item['file'])))
+        if resume_import_id:
+            _drop_stale_files(engine, import_id, {item['sha256'] for item in items})
+        files = [None] * len(items)
+        first_seen, todo = {}, []
+        for i, item in enumerate(items):
+            sha, metrics = item['sha256'], file_metrics[i]
+            if dedupe and sha in first_seen:
+                files[i] = _log_file(import_id, _file_result(item, 0, duplicate_of=items[first_seen[sha]]['file'].name, metrics=metrics))
+                _notify(report(i), status="duplicate", rows_parsed=0, rows_inserted=0)
+                continue
+            first_seen[sha] = i
+            landed = _find_landed(engine, import_id, sha) if resume_import_id else None
+            if landed is not None:
+                files[i] = _log_file(import_id, _file_result(item, landed, metrics=metrics, resumed_rows=landed))
+                _notify(report(i), status="done", rows_parsed=0, rows_inserted=landed)
+                continue
+            # a partial file of the silo being resumed is continued, never linked on top of its chunks
+            partial = resume_import_id and _has_chunks(engine, import_id, sha)
+            prior = _find_ingested(engine, sha) if dedupe and not partial else None
+            if prior:
+                with metrics.stage("link") as entry:
+                    rows, rejected = _link_file(engine, prior[0], import_id, item['type'], sha, snapshot_date)
+                    entry["rows"] += rows
+                if rows == prior[1]:
+                    _record_file(engine, import_id, item, rows, reused_from=prior[0])
+                    files[i] = _log_file(import_id, _file_result(item, rows, reused_from=prior[0], metrics=metrics, rejected_rows=rejected))
+                    _notify(report(i), status="reused", rows_parsed=0, rows_inserted=rows, rows_rejected=rejected)
+                    continue
+                # source silo changed underneath us: drop the partial link and ingest
                 with engine.begin() as conn:
-                    conn.execute(text(f"INSERT INTO public.stg_mls_classified ({cols}) VALUES ({vals})"), records)
-            os.remove(path)
-            
-        return {"ok": True, "import_id": import_id}
+                    for table in ("stg_mls_classified", "stg_mls_rejects"):
+                        conn.execute(text(f"DELETE FROM public.{table} WHERE import_id = :id AND file_sha256 = :sha"), {"id": import_id, "sha": sha})
+            todo.append(i)
+
+        # 3. Classify + load the remaining files into the silo
+        if workers and workers > 1 and len(todo) > 1:
+            loaded = _run_parallel(engine, [items[i] for i in todo], import_id, snapshot_date, chunk_rows, workers, row_hashes,
+                                   [report(i) for i in todo], [file_metrics[i] for i in todo], quarantine)
+        else:
+            loaded = [_run_file(engine, items[i], import_id, snapshot_date, chunk_rows, row_hashes, report(i), file_metrics[i], quarantine) for i in todo]
+        for i, res in zip(todo, loaded):
+            files[i] = res
+
+        # 4. Materialize the silo rollups the dashboards read
+        batch = StageMetrics()
+        with batch.stage("rollups"):
+            rollup_rows = build_rollups(engine, import_id) if supports_rollups(engine) else 0
+
+        # every file has landed: the silo is now visible to the reports
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE public.stg_mls_imports SET status = 'complete' WHERE import_id = :id"), {"id": import_id})
+
+        # 5. Local columnar copy (optional, Postgres stays the system of record)
+        result = {"ok": True, "import_id": import_id, "files": files, "rollup_rows": rollup_rows,
+                  "rejected_rows": sum(f['rejected_rows'] for f in files)}
+        if validation:
+            result["validation"] = [v.as_dict() for v in validation]
+        store = get_snapshot_store()
+        if store is not None:
+            try:
+                with batch.stage("snapshot") as entry:
+                    result["snapshot_rows"] = store.write_silo(engine, import_id)
+                    entry["rows"] += result["snapshot_rows"]
+            except Exception as e:
+                result["snapshot_error"] = str(e)
+
+        # 6. Stage metrics: result, structured log and the silo header
+        metrics = summarize(files)
+        metrics["batch"] = batch.as_dict()
+        metrics["rows"] = sum(f['rows'] for f in files)
+        result["metrics"] = metrics
+        log_event("etl_batch", import_id=import_id, files=len(files), **metrics)
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("UPDATE public.stg_mls_imports SET etl_metrics = :m WHERE import_id = :id"),
+                             {"m": json.dumps(metrics), "id": import_id})
+        except Exception as e:
+            result["metrics_error"] = str(e)
+
+        return result
     except Exception as e:
-        return {"ok": False, "error": str(e)}
+        # checkpoints stay: run again with resume_import_id to pick up where this stopped
+        if loading:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("UPDATE public.stg_mls_imports SET status = 'failed' WHERE import_id = :id"), {"id": import_id})
+            except Exception:
+                pass
+        return {"ok": False, "error": str(e), "import_id": import_id}
+    finally:
+        # the header is visible before the rows land: drop anything a
+        # concurrent session cached from the half-written silo
+        if import_id:
+            get_silo_cache().invalidate(import_id)
+            CompsEngine.invalidate(import_id)
@@ -1,6 +1,7 @@
 import pandas as pd
 from sqlalchemy import text
-from backend.etl import get_engine
+from backend.db import get_engine
+from backend.core.silo_cache import get_silo_cache
 
 class MarketReports:
     def __init__(self):
@@ -8,18 +9,20 @@ class MarketReports:
 
     def list_all_reports(self):
         """Fetches all reports. Used to populate the sidebar selector."""
-        query = text("SELECT import_id, report_name, snapshot_date FROM public.stg_mls_imports ORDER BY imported_at DESC")
+        query = text("SELECT import_id, report_name, snapshot_date FROM public.stg_mls_imports WHERE status = 'complete' ORDER BY imported_at DESC")
         with self.engine.connect() as conn:
             return pd.read_sql(query, conn)
 
     def load_report_data(self, import_id, category):
-        """Loads data ONLY for the selected Silo and Category."""
+        """Loads data ONLY for the selected Silo and Category (cached, silos are immutable)."""
         query = text("""
             SELECT * FROM public.stg_mls_classified 
             WHERE import_id = :id AND asset_class = :cls
         """)
-        with self.engine.connect() as conn:
-            return pd.read_sql(query, conn, params={"id": import_id, "cls": category})
+        def load():
+            with self.engine.connect() as conn:
+                return pd.read_sql(query, conn, params={"id": import_id, "cls": category})
+        return get_silo_cache().get_or_load(import_id, category, load)
 
     def get_inventory_overview(self, df):
         if df.empty: return pd.DataFrame()
@@ -0,0 +1,98 @@
+"""
+Classification throughput — row-by-row vs columnar
+
+Usage:
+    python -m benchmarks.classify_throughput --rows 100000
+
+Gera um DataFrame MLS sintético por asset class (colunas de `sources` do
+contrato), roda os dois classificadores, confere que a saída é idêntica e
+imprime rows/sec de cada caminho.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backend.core.mls_classifier import classify_dataframe_rowwise, infer_asset_class
+from backend.core.mls_classify import load_contract
+from backend.core.mls_columnar import classify_frame
+
+CONTRACT_PATH = Path("backend/contract/mls_column_contract.yaml")
+
+_STATUSES = {
+    "rental": ["ACT", "PND", "LSE"],
+    "land": ["ACT", "PND", "SLD"],
+    "residential_sale": ["ACT", "PND", "SLD"],
+}
+
+
+def synthetic_frame(asset_class: str, contract: dict, rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col in contract["sources"][asset_class]["columns"]:
+        if col == "#":
+            data[col] = np.arange(1, rows + 1)
+        elif col == "Status":
+            data[col] = rng.choice(_STATUSES[asset_class], rows)
+        elif col == "Current Price":
+            prices = rng.integers(1_000, 900_000, rows).astype(object)
+            fmt = rng.random(rows) < 0.3
+            prices[fmt] = [f"${p:,}" for p in prices[fmt]]
+            data[col] = prices
+        elif col == "Zip":
+            data[col] = rng.choice([34286, 34287, 34288, 34289, 34291], rows)
+        elif col in ("Close Date", "Date Available"):
+            d = pd.to_datetime("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D")
+            data[col] = pd.Series(d).where(rng.random(rows) > 0.4)
+        elif col in ("Beds", "Full Baths", "Half Baths", "Year Built", "ADOM", "CDOM",
+                     "Days to Contract", "Heated Area", "Lot Size Square Footage"):
+            v = rng.integers(0, 4000, rows).astype(float)
+            v[rng.random(rows) < 0.1] = np.nan
+            data[col] = v
+        elif col in ("Total Acreage", "LP / SqFt", "SP/SqFt", "SP / LP", "Tax"):
+            data[col] = np.round(rng.random(rows) * 500, 2)
+        else:
+            pool = np.array([f"{col} {i}" for i in range(50)] + ["", " ", "N/A"], dtype=object)
+            v = rng.choice(pool, rows)
+            v[rng.random(rows) < 0.05] = None
+            data[col] = v
+    return pd.DataFrame(data)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    contract = load_contract(CONTRACT_PATH)
+    snapshot = date(2025, 12, 31)
+
+    print(f"{'asset_class':<18}{'rows':>10}{'rowwise r/s':>16}{'columnar r/s':>16}{'speedup':>10}")
+    for asset_class in ("residential_sale", "land", "rental"):
+        df = synthetic_frame(asset_class, contract, args.rows)
+        assert infer_asset_class(df.columns.tolist(), contract) == asset_class
+
+        old, t_old = _timed(classify_dataframe_rowwise, df.copy(), contract, snapshot)
+        new, t_new = _timed(classify_frame, df.copy(), contract, asset_class, snapshot)
+        pd.testing.assert_frame_equal(old, new)
+
+        print(
+            f"{asset_class:<18}{args.rows:>10}{args.rows / t_old:>16,.0f}"
+            f"{args.rows / t_new:>16,.0f}{t_old / t_new:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -60,3 +60,187 @@ on public.stg_mls(project_id);
 
 create index if not exists idx_stg_mls_status
 on public.stg_mls(status_norm);
+
+
+-- =========================
+-- IMPORT FILES (content fingerprints)
+-- =========================
+
+create table if not exists public.stg_mls_import_files (
+    id bigserial primary key,
+
+    import_id uuid not null,
+    file_name text,
+    file_sha256 text not null,
+    asset_class text,
+    row_count integer,
+
+    -- silo the rows were linked from (null = parsed + classified here)
+    reused_from uuid,
+
+    imported_at timestamp default now()
+);
+
+create index if not exists idx_stg_mls_import_files_sha
+on public.stg_mls_import_files(file_sha256, imported_at desc);
+
+create index if not exists idx_stg_mls_import_files_import
+on public.stg_mls_import_files(import_id);
+
+-- classified rows remember which file (and optionally which content) they came from
+alter table public.stg_mls_classified add column if not exists file_sha256 text;
+alter table public.stg_mls_classified add column if not exists row_hash bigint;
+
+create index if not exists idx_stg_mls_classified_import_file
+on public.stg_mls_classified(import_id, file_sha256);
+
+
+-- =========================
+-- SILO ROLLUPS (built by run_batch_etl when an import commits)
+-- =========================
+
+create table if not exists public.mls_silo_rollups (
+    id bigserial primary key,
+
+    import_id uuid not null,
+    asset_class text,
+    level text not null,            -- 'subdivision' | 'zip' (zip total, subdivision is null)
+    zip text,
+    subdivision text,
+    status_group text,
+
+    row_count integer not null,
+
+    list_price_n integer,
+    list_price_sum double precision,
+    list_price_mean double precision,
+    list_price_median double precision,
+
+    close_price_n integer,
+    close_price_sum double precision,
+    close_price_mean double precision,
+    close_price_median double precision,
+
+    price_sqft_n integer,
+    price_sqft_sum double precision,
+    price_sqft_mean double precision,
+    price_sqft_median double precision,
+
+    dom_n integer,
+    dom_sum double precision,
+    dom_mean double precision,
+    dom_median double precision,
+
+    heated_area_n integer,
+    heated_area_sum double precision,
+    heated_area_mean double precision,
+    heated_area_median double precision,
+
+    built_at timestamp default now()
+);
+
+create index if not exists idx_mls_silo_rollups_silo
+on public.mls_silo_rollups(import_id, asset_class, level, zip);
+
+create index if not exists idx_stg_mls_classified_silo_zip
+on public.stg_mls_classified(import_id, asset_class, zip);
+
+-- stable tiebreak for keyset-paginated grids (ml_number is not unique in a silo)
+alter table public.stg_mls_classified add column if not exists row_id bigserial;
+
+create index if not exists idx_stg_mls_classified_silo_row
+on public.stg_mls_classified(import_id, asset_class, row_id);
+
+-- one per sortable grid column (GRID_SORTS): keyset pages are index range scans
+create index if not exists idx_stg_mls_classified_silo_ml_number
+on public.stg_mls_classified(import_id, asset_class, ml_number, row_id);
+
+create index if not exists idx_stg_mls_classified_silo_list_price
+on public.stg_mls_classified(import_id, asset_class, list_price, row_id);
+
+create index if not exists idx_stg_mls_classified_silo_close_price
+on public.stg_mls_classified(import_id, asset_class, close_price, row_id);
+
+create index if not exists idx_stg_mls_classified_silo_heated_area
+on public.stg_mls_classified(import_id, asset_class, heated_area, row_id);
+
+create index if not exists idx_stg_mls_classified_silo_adom
+on public.stg_mls_classified(import_id, asset_class, adom, row_id);
+
+create index if not exists idx_stg_mls_classified_silo_close_date
+on public.stg_mls_classified(import_id, asset_class, close_date, row_id);
+
+-- =========================
+-- ETL stage metrics
+-- =========================
+
+-- per-stage wall time / rows/sec / peak memory of the run that built the silo
+alter table public.stg_mls_imports add column if not exists etl_metrics jsonb;
+
+-- =========================
+-- BACKGROUND ETL JOBS (backend/core/etl_jobs)
+-- =========================
+
+create table if not exists public.etl_jobs (
+    job_id uuid primary key,
+    report_name text,
+    snapshot_date date,
+    status text not null default 'queued', -- queued | running | succeeded | failed
+    import_id uuid,
+
+    -- [{file, type, status, rows_parsed, rows_inserted}] in upload order
+    files jsonb,
+    rows_parsed bigint default 0,
+    rows_inserted bigint default 0,
+    error text,
+
+    -- process running it (resume can move a job to another one) and its liveness
+    owner_host text,
+    owner_pid integer,
+    heartbeat_at timestamp,
+
+    created_at timestamp default now(),
+    started_at timestamp,
+    finished_at timestamp
+);
+
+create index if not exists idx_etl_jobs_created
+on public.etl_jobs(created_at desc);
+
+-- =========================
+-- RESUMABLE INGESTION (checkpoints)
+-- =========================
+
+-- loading | complete | failed; reports only list complete silos
+alter table public.stg_mls_imports add column if not exists status text default 'complete';
+
+-- one row per committed chunk, written in the same transaction as its rows
+create table if not exists public.stg_mls_import_chunks (
+    import_id uuid not null,
+    file_sha256 text not null,
+    chunk_index integer not null,
+    chunk_rows integer not null, -- rows per chunk the file was split into (0 = whole file)
+    row_count integer not null,
+    committed_at timestamp default now(),
+    primary key (import_id, file_sha256, chunk_index)
+);
+
+-- =========================
+-- QUARANTINE (rows with a missing / unmapped status)
+-- =========================
+
+-- written with the chunk they were split from; the rest of the file still loads
+create table if not exists public.stg_mls_rejects (
+    import_id uuid not null,
+    file_sha256 text not null,
+    file_name text,
+    asset_class text,
+    row_number integer not null, -- 1-based data row of the file (header and blank rows excluded)
+    status_raw text,
+    reason text not null, -- missing_status | unmapped_status
+    raw_row jsonb,
+    rejected_at timestamp default now()
+);
+
+create index if not exists idx_stg_mls_rejects_import
+on public.stg_mls_rejects(import_id, file_sha256);
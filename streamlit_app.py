@@ -1,13 +1,25 @@
+import os
 import streamlit as st
 from datetime import date
-from backend.etl import run_batch_etl
-from backend.core.reports import MarketReports
+from backend.db import pool_stats
+from backend.core.etl_jobs import get_job_runner
+from backend.core.mls_reader import DEFAULT_CHUNK_ROWS
+from backend.core.reports import GRID_SORTS, MarketReports
 from backend.ui.styles import apply_premium_style
 
 # 1. SETUP
+GRID_PAGE_ROWS = 200  # rows per server-side grid page
+JOB_POLL_SECONDS = 2  # ingestion panel refresh while batches run
 st.set_page_config(page_title="Market Lens Enterprise", layout="wide", initial_sidebar_state="expanded")
 apply_premium_style()
-reports = MarketReports()
+
+@st.cache_resource
+def get_reports():
+    # one MarketReports (and one pooled engine) shared by every session
+    return MarketReports()
+
+reports = get_reports()
+jobs = get_job_runner()
 
 # 2. STATE CONTROLLER (The fix for "No Active Report")
 if 'view' not in st.session_state: st.session_state.view = 'Properties'
@@ -50,6 +62,13 @@ with st.sidebar:
     except:
         st.error("Database connection error.")
 
+    with st.expander("Diagnostics"):
+        st.caption("Connection pool")
+        st.json(pool_stats())
+        st.caption("Silo cache")
+        st.json(reports.cache_stats())
+        st.dataframe(reports.cached_silos(), use_container_width=True)
+
 # --- MAIN WORKSPACE ---
 view = st.session_state.view
 
@@ -68,43 +87,109 @@ if view == 'New Report':
             f_type = c2.selectbox("Type", ["Properties", "Land", "Rental"], key=f"type_{f.name}")
             files_data.append({'file': f, 'type': f_type})
         
+        # off: an unmapped / missing Status fails the file; on: those rows go to the rejects table
+        quarantine = st.checkbox("Quarantine rows with unknown status", value=False)
+
         if st.button("🚀 Run Batch ETL", type="primary", use_container_width=True):
             if report_name:
-                with st.spinner("Creating Silo..."):
-                    res = run_batch_etl(files_data, report_name, date.today())
-                    if res['ok']:
-                        # FORCE STATE UPDATE
-                        st.session_state.active_id = res['import_id']
-                        st.session_state.view = 'Properties'
-                        st.rerun()
-                    else:
-                        st.error(res['error'])
+                # runs in the background: this session (and every other one) stays interactive
+                workers = max(1, (os.cpu_count() or 1) // jobs.workers)
+                jobs.submit(files_data, report_name, date.today(), chunk_rows=DEFAULT_CHUNK_ROWS, workers=workers, quarantine=quarantine)
+                st.toast(f"Queued '{report_name}'")
             else:
                 st.warning("Please name your report.")
     st.markdown("</div>", unsafe_allow_html=True)
 
+    def render_jobs():
+        recent = jobs.list_jobs(limit=10)
+        if not recent:
+            return
+        st.markdown("### ⚙️ Ingestion Jobs")
+        for job in recent:
+            total = len(job['files'] or [])
+            done = sum(1 for f in job['files'] or [] if f['status'] in ("done", "reused", "duplicate"))
+            c1, c2 = st.columns([3, 1])
+            c1.markdown(f"**{job['report_name']}** · {job['status']} · {job['rows_inserted']:,} rows inserted")
+            c1.progress(done / total if total else 0.0, text=f"{done}/{total} files")
+            if job['status'] == 'succeeded' and c2.button("Open", key=f"open_{job['job_id']}"):
+                st.session_state.active_id = job['import_id']
+                st.session_state.view = 'Properties'
+                st.rerun()
+            if job['status'] == 'failed':
+                c1.error(job['error'])
+                # committed chunks stay in the silo: resume skips them
+                if jobs.can_resume(job['job_id']):
+                    if c2.button("Resume", key=f"resume_{job['job_id']}"):
+                        jobs.resume(job['job_id'])
+                    # frees the uploads this process keeps for the resume
+                    elif c2.button("Dismiss", key=f"dismiss_{job['job_id']}"):
+                        jobs.dismiss(job['job_id'])
+            with c1.expander("Files"):
+                st.dataframe(job['files'], use_container_width=True)
+
+    # poll the jobs table while this view is open (fragments re-run on their own)
+    if hasattr(st, "fragment"):
+        st.fragment(run_every=JOB_POLL_SECONDS)(render_jobs)()
+    else:
+        render_jobs()
+        st.button("Refresh jobs")
+
 elif view in ['Properties', 'Land', 'Rental']:
     st.title(f"{view} Analytics")
     if st.session_state.active_id:
-        # LOAD DATA FOR THIS SPECIFIC SILO AND CATEGORY
-        df = reports.load_report_data(st.session_state.active_id, view)
+        silo_id = st.session_state.active_id
+        # SUMMARY FIRST: the per-ZIP overview comes from SQL, not from the silo rows
+        overview = reports.get_inventory_overview_sql(silo_id, view)
         
-        if not df.empty:
-            zips = sorted([str(z) for z in df['zip'].unique() if z])
+        if not overview.empty:
+            zips = [str(z) for z in overview['ZIP CODE']]
             tab_labels = ["📊 Overview", "⚖️ Compare"] + [f"📍 {z}" for z in zips]
-            tabs = st.tabs(tab_labels)
+            # Only the open tab is rendered (st.tabs would build every table up front)
+            tab = st.radio("Section", tab_labels, horizontal=True, label_visibility="collapsed", key=f"tab_{silo_id}_{view}")
+            rollup_cols = ['zip', 'status_group', 'row_count', 'list_price_median', 'close_price_median', 'price_sqft_median', 'dom_median']
             
-            with tabs[0]: # Overview
-                st.markdown("<div class='main-card'>", unsafe_allow_html=True)
-                st.dataframe(reports.get_inventory_overview(df), use_container_width=True)
-                st.markdown("</div>", unsafe_allow_html=True)
+            st.markdown("<div class='main-card'>", unsafe_allow_html=True)
+            if tab == tab_labels[0]: # Overview
+                st.dataframe(overview, use_container_width=True)
+                
+            elif tab == tab_labels[1]: # Compare (precomputed ZIP rollups)
+                rollups = reports.get_rollups(silo_id, view)
+                if not rollups.empty:
+                    st.dataframe(rollups[rollup_cols], use_container_width=True)
+                    
+            else: # ZIP detail
+                zip_code = zips[tab_labels.index(tab) - 2]
+                subs = reports.get_rollups(silo_id, view, level="subdivision", zip_code=zip_code)
+                if not subs.empty:
+                    st.dataframe(subs[['subdivision'] + rollup_cols[1:]], use_container_width=True)
+                    
+                # server-side grid: one keyset page per rerun, sort/filter in SQL
+                grid = f"grid_{silo_id}_{view}_{zip_code}"
+                c1, c2, c3 = st.columns([2, 1, 1])
+                sort = c1.selectbox("Sort by", GRID_SORTS, key=f"{grid}_sort")
+                descending = c2.toggle("Descending", key=f"{grid}_desc")
+                status = c3.selectbox("Status", ["All", "listing", "pending", "closed"], key=f"{grid}_status")
+                filters = {"zip": zip_code}
+                if status != "All": filters["status_group"] = status
+                
+                state = (sort, descending, status)
+                if st.session_state.get(f"{grid}_state") != state:
+                    st.session_state[f"{grid}_state"] = state
+                    st.session_state[f"{grid}_cursors"] = [None]
+                cursors = st.session_state[f"{grid}_cursors"]
+                
+                page = reports.fetch_page(silo_id, view, filters=filters, sort=sort, descending=descending, after=cursors[-1], page_size=GRID_PAGE_ROWS)
+                st.dataframe(page["rows"], use_container_width=True)
                 
-            # Other tabs logic...
-            for i, zip_code in enumerate(zips):
-                with tabs[i+2]:
-                    st.markdown("<div class='main-card'>", unsafe_allow_html=True)
-                    st.dataframe(df[df['zip'].astype(str) == zip_code], use_container_width=True)
-                    st.markdown("</div>", unsafe_allow_html=True)
+                p1, p2, p3 = st.columns([1, 1, 4])
+                if p1.button("◀ Prev", key=f"{grid}_prev", disabled=len(cursors) == 1):
+                    cursors.pop()
+                    st.rerun()
+                if p2.button("Next ▶", key=f"{grid}_next", disabled=page["next"] is None):
+                    cursors.append(page["next"])
+                    st.rerun()
+                p3.caption(f"Page {len(cursors)}")
+            st.markdown("</div>", unsafe_allow_html=True)
         else:
             st.info(f"No {view} data found in the selected report silo.")
     else:
@@ -0,0 +1,56 @@
+"""Recovery of interrupted jobs on SQLite: only jobs nobody is running any more fail."""
+
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+import backend.core.etl_jobs as etl_jobs
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    eng = create_engine(f"sqlite:///{tmp_path / 'ml.db'}")
+
+    @event.listens_for(eng, "connect")
+    def _attach(dbapi_conn, _):
+        dbapi_conn.execute(f"ATTACH DATABASE '{tmp_path / 'public.db'}' AS public")
+
+    with eng.begin() as c:
+        c.execute(text("create table public.stg_mls_imports (import_id text, status text)"))
+        c.execute(text("create table public.etl_jobs (job_id text primary key, report_name text, snapshot_date date, status text, import_id text, files text, rows_parsed integer, rows_inserted integer, error text, owner_host text, owner_pid integer, heartbeat_at timestamp, created_at timestamp default current_timestamp, started_at timestamp, finished_at timestamp)"))
+    monkeypatch.setattr(etl_jobs, "get_engine", lambda: eng)
+    r = etl_jobs.EtlJobRunner(workers=1)
+    yield r
+    r.shutdown()
+
+
+def add_job(runner, job_id, host, pid, beat):
+    with etl_jobs.get_engine().begin() as c:
+        c.execute(text(f"INSERT INTO public.etl_jobs (job_id, status, import_id, owner_host, owner_pid, heartbeat_at) VALUES (:id, 'running', :id, :host, :pid, {beat})"),
+                  {"id": job_id, "host": host, "pid": pid})
+        c.execute(text("INSERT INTO public.stg_mls_imports (import_id, status) VALUES (:id, 'loading')"), {"id": job_id})
+
+
+def statuses():
+    with etl_jobs.get_engine().connect() as c:
+        jobs = dict(c.execute(text("SELECT job_id, status FROM public.etl_jobs")).fetchall())
+        silos = dict(c.execute(text("SELECT import_id, status FROM public.stg_mls_imports")).fetchall())
+    return jobs, silos
+
+
+def test_recover_stale_leaves_live_owners_alone(runner):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+
+    fresh, old = "CURRENT_TIMESTAMP", "datetime('now', '-1 hour')"
+    add_job(runner, "replica", "other-host", 1, fresh)
+    add_job(runner, "mine", runner.host, runner.pid, fresh)
+    add_job(runner, "stale", "other-host", 1, old)
+    add_job(runner, "dead", runner.host, dead.pid, fresh)
+
+    assert runner.recover_stale() == 2
+    jobs, silos = statuses()
+    assert jobs == {"replica": "running", "mine": "running", "stale": "failed", "dead": "failed"}
+    assert silos == {"replica": "loading", "mine": "loading", "stale": "failed", "dead": "failed"}
@@ -0,0 +1,24 @@
+"""Stage metrics: nested stages keep their own peaks, concurrent runs never share tracemalloc."""
+
+import tracemalloc
+
+from backend.core.etl_metrics import StageMetrics
+
+
+def test_traced_peaks_are_per_stage_and_exclusive_between_runs():
+    traced, other = StageMetrics(trace_memory=True), StageMetrics(trace_memory=True)
+    with traced.stage("outer"):
+        block = bytearray(30 << 20)
+        del block
+        with traced.stage("inner"):
+            block = bytearray(5 << 20)
+            del block
+        with other.stage("concurrent"):
+            pass
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
+
+    stages = traced.as_dict()
+    assert stages["outer"]["peak_mb"] >= 30
+    assert 5 <= stages["inner"]["peak_mb"] < 30
+    assert other.as_dict()["concurrent"]["peak_mb"] is None
@@ -0,0 +1,119 @@
+"""Resume of a failed batch on SQLite (the "public" schema is an attached database)."""
+
+import io
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, event, text
+
+import backend.etl as etl
+from backend.core.mls_contract import CLASSIFIED_FIELDS
+
+RENTAL_COLUMNS = [
+    "#", "ML Number", "Status", "County", "Current Price", "Address", "City", "Zip", "Beds",
+    "Full Baths", "Half Baths", "Heated Area", "Year Built", "Date Available", "Pets Allowed", "Close Date",
+]
+
+
+class Upload:
+    def __init__(self, name, df):
+        buf = io.StringIO()
+        df.to_csv(buf, index=False)
+        self.name, self._data = name, buf.getvalue().encode()
+
+    def getbuffer(self):
+        return memoryview(self._data)
+
+
+def rental_rows(n, prefix):
+    return pd.DataFrame({
+        "#": range(1, n + 1), "ML Number": [f"{prefix}{i}" for i in range(n)],
+        "Status": ["ACT", "PND", "LSE"] * (n // 3) + ["ACT"] * (n % 3),
+        "County": "Sarasota", "Current Price": 2500, "Address": "1 Main St", "City": "North Port",
+        "Zip": "34288", "Beds": 3, "Full Baths": 2, "Half Baths": 0, "Heated Area": 1500,
+        "Year Built": 2005, "Date Available": "01/15/2025", "Pets Allowed": "Yes", "Close Date": None,
+    })[RENTAL_COLUMNS]
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    main, public = tmp_path / "ml.db", tmp_path / "public.db"
+    eng = create_engine(f"sqlite:///{main}")
+
+    @event.listens_for(eng, "connect")
+    def _attach(dbapi_conn, _):
+        dbapi_conn.execute(f"ATTACH DATABASE '{public}' AS public")
+
+    cols = ["snapshot_date", "asset_class", "status_raw", "status_group", "closed_type"] + [f[0] for f in CLASSIFIED_FIELDS]
+    with eng.begin() as c:
+        c.execute(text("create table public.stg_mls_imports (import_id text, report_name text, source_file text, source_tag text, snapshot_date date, status text, etl_metrics text, imported_at timestamp default current_timestamp)"))
+        c.execute(text(f"create table public.stg_mls_classified (row_id integer primary key autoincrement, {', '.join(cols)}, import_id text, file_sha256 text, row_hash bigint)"))
+        c.execute(text("create table public.stg_mls_import_files (import_id text, file_name text, file_sha256 text, asset_class text, row_count integer, reused_from text, imported_at timestamp default current_timestamp)"))
+        c.execute(text("create table public.stg_mls_import_chunks (import_id text, file_sha256 text, chunk_index integer, chunk_rows integer, row_count integer, committed_at timestamp, primary key (import_id, file_sha256, chunk_index))"))
+        c.execute(text("create table public.stg_mls_rejects (import_id text, file_sha256 text, file_name text, asset_class text, row_number integer, status_raw text, reason text, raw_row text, rejected_at timestamp)"))
+    monkeypatch.setattr(etl, "get_engine", lambda: eng)
+    monkeypatch.setattr(etl, "get_snapshot_store", lambda: None)
+    return eng
+
+
+def test_resume_with_replaced_file_drops_the_old_rows(engine, monkeypatch):
+    insert = etl.insert_rows
+    calls = {"n": 0}
+
+    def fail_third_chunk(conn, df, table="public.stg_mls_classified"):
+        if table.endswith("classified"):
+            calls["n"] += 1
+            if calls["n"] == 3:
+                raise RuntimeError("connection lost")
+        return insert(conn, df, table)
+
+    monkeypatch.setattr(etl, "insert_rows", fail_third_chunk)
+    bad = Upload("rental.csv", rental_rows(350, "OLD"))
+    res = etl.run_batch_etl([{"file": bad, "type": "Rental"}], "R", "2025-01-01", chunk_rows=100, dedupe=False)
+    assert not res["ok"]
+    with engine.connect() as c:
+        assert c.execute(text("select count(*) from public.stg_mls_classified")).scalar() == 200
+
+    monkeypatch.setattr(etl, "insert_rows", insert)
+    fixed = Upload("rental_fixed.csv", rental_rows(340, "NEW"))
+    res = etl.run_batch_etl([{"file": fixed, "type": "Rental"}], "R", "2025-01-01", chunk_rows=100,
+                            dedupe=False, resume_import_id=res["import_id"])
+    assert res["ok"], res.get("error")
+
+    with engine.connect() as c:
+        assert c.execute(text("select status from public.stg_mls_imports")).scalar() == "complete"
+        assert c.execute(text("select count(*) from public.stg_mls_classified where ml_number like 'OLD%'")).scalar() == 0
+        assert c.execute(text("select count(*) from public.stg_mls_classified")).scalar() == 340
+        assert c.execute(text("select count(distinct file_sha256) from public.stg_mls_import_chunks")).scalar() == 1
+
+
+def test_resume_continues_a_partial_file_instead_of_linking_it(engine, monkeypatch):
+    insert = etl.insert_rows
+    calls = {"n": 0}
+
+    def fail_third_chunk(conn, df, table="public.stg_mls_classified"):
+        if table.endswith("classified"):
+            calls["n"] += 1
+            if calls["n"] == 3:
+                raise RuntimeError("connection lost")
+        return insert(conn, df, table)
+
+    upload = Upload("rental.csv", rental_rows(350, "R"))
+    monkeypatch.setattr(etl, "insert_rows", fail_third_chunk)
+    failed = etl.run_batch_etl([{"file": upload, "type": "Rental"}], "R", "2025-01-01", chunk_rows=100)
+    assert not failed["ok"]
+
+    # the same content lands completely in another silo meanwhile
+    monkeypatch.setattr(etl, "insert_rows", insert)
+    other = etl.run_batch_etl([{"file": upload, "type": "Rental"}], "R2", "2025-01-01", chunk_rows=100)
+    assert other["ok"], other.get("error")
+
+    res = etl.run_batch_etl([{"file": upload, "type": "Rental"}], "R", "2025-01-01", chunk_rows=100,
+                            resume_import_id=failed["import_id"])
+    assert res["ok"], res.get("error")
+    assert res["files"][0]["reused_from"] is None
+    assert res["files"][0]["resumed_rows"] == 200
+    with engine.connect() as c:
+        rows = c.execute(text("select count(*), count(distinct ml_number) from public.stg_mls_classified where import_id = :id"),
+                         {"id": failed["import_id"]}).fetchone()
+    assert tuple(rows) == (350, 350)
@@ -0,0 +1,48 @@
+"""classify_frame (columnar) must match the row-by-row reference classifier."""
+
+from datetime import date, datetime
+from itertools import cycle, islice
+
+import pandas as pd
+import pytest
+
+from backend.core.mls_classifier import classify_dataframe_rowwise
+from backend.core.mls_columnar import classify_frame
+from backend.core.mls_contract import get_contract
+
+ROWS = 24
+PRICES = ["$1,234", 250000, 1999.5, "", None, "n/a", " $ 12,000 ", "abc", 0]
+DATES = ["01/15/2025", "2025-01-15", pd.Timestamp("2024-12-31"), datetime(2025, 3, 1, 10, 30), date(2025, 2, 2),
+         None, "", "N/A", "02/30/2025", "1/2/2025"]
+NUMBERS = ["3", 4, 2.5, "", None, "1,200", "x", 1500.0]
+TEXT = ["  North Port ", "Venice", "", None, "N/A", 34288, "Lot 7"]
+
+
+def take(values, offset=0):
+    return list(islice(cycle(values), offset, offset + ROWS))
+
+
+def mixed_frame(contract, asset_class):
+    statuses = [s for s in contract["status_rules"][asset_class]] + [" " + next(iter(contract["status_rules"][asset_class])) + " "]
+    data = {}
+    for i, col in enumerate(contract["sources"][asset_class]["columns"]):
+        if col == "Status":
+            data[col] = take(statuses)
+        elif col == "Current Price":
+            data[col] = take(PRICES)
+        elif "Date" in col:
+            data[col] = take(DATES, i)
+        elif col in ("ML Number", "Zip", "Address", "City", "County") or not col[0].isalpha():
+            data[col] = take(TEXT, i)
+        else:
+            data[col] = take(NUMBERS + TEXT, i)
+    return pd.DataFrame(data, dtype=object)
+
+
+@pytest.mark.parametrize("asset_class", ["residential_sale", "land", "rental"])
+def test_classify_frame_matches_rowwise(asset_class):
+    contract, snapshot = get_contract(), date(2025, 12, 31)
+    df = mixed_frame(contract, asset_class)
+    rowwise = classify_dataframe_rowwise(df.copy(), contract, snapshot)
+    columnar = classify_frame(df.copy(), contract, asset_class, snapshot)
+    pd.testing.assert_frame_equal(rowwise, columnar)
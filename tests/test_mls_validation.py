@@ -0,0 +1,65 @@
+"""Pre-validation of uploads: header checks and the Status sweep (CSV and XLSX)."""
+
+import io
+
+import pandas as pd
+from openpyxl import Workbook
+
+from backend.core.mls_contract import get_contract
+from backend.core.mls_validation import prevalidate
+from tests.test_etl_resume import rental_rows
+
+
+def xlsx_bytes(df, blank_rows=()):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(list(df.columns))
+    for i, row in enumerate(df.itertuples(index=False)):
+        if i in blank_rows:
+            ws.append([])
+        ws.append([None if pd.isna(v) else v for v in row])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def csv_bytes(df):
+    return df.to_csv(index=False).encode()
+
+
+def bad_statuses():
+    df = rental_rows(9, "X")
+    df.loc[1, "Status"] = "ZZZ"
+    df.loc[4, "Status"] = "ZZZ"
+    df.loc[7, "Status"] = "N/A"
+    return df
+
+
+def test_xlsx_statuses_are_left_to_the_chunks_by_default():
+    report = prevalidate(xlsx_bytes(bad_statuses()), "rental.xlsx", get_contract(), "Rental")
+    assert report.ok
+    assert not report.statuses_checked
+
+
+def test_xlsx_sweep_counts_statuses_like_csv():
+    contract, df = get_contract(), bad_statuses()
+    for data, name in ((xlsx_bytes(df, blank_rows=(3,)), "rental.xlsx"), (csv_bytes(df), "rental.csv")):
+        report = prevalidate(data, name, contract, "Rental", sweep_xlsx=True)
+        assert report.statuses_checked
+        assert report.unmapped_statuses == {"ZZZ": 2}
+        assert report.missing_status == 1
+        assert not report.ok
+
+
+def test_xlsx_bad_statuses_are_warnings_with_quarantine():
+    report = prevalidate(xlsx_bytes(bad_statuses()), "rental.xlsx", get_contract(), "Rental", quarantine=True, sweep_xlsx=True)
+    assert report.ok
+    assert report.bad_rows == 3
+    assert report.warnings
+
+
+def test_category_mismatch_is_a_warning():
+    report = prevalidate(csv_bytes(rental_rows(6, "R")), "rental.csv", get_contract(), "Properties")
+    assert report.ok
+    assert report.asset_class == "rental"
+    assert any("uploaded as Properties" in w for w in report.warnings)
@@ -0,0 +1,60 @@
+"""Vectorized date parsing must return exactly what the row-wise to_date does."""
+
+import pandas as pd
+import pytest
+
+from backend.core.mls_contract import compile_contract, get_contract
+from backend.core.normalization import (
+    clean_string,
+    clean_string_column,
+    is_month_first,
+    to_date,
+    to_date_column,
+    to_numeric,
+    to_numeric_column,
+)
+
+DATES = ["01/05/1969", "12/31/2068", "02/03/1970", "2/3/2024", "02/30/2024", "", None, "n/a", "2024-06-30"]
+
+
+def declared_formats():
+    return sorted({c["format"] for c in get_contract()["column_catalog"] if c.get("format")})
+
+
+@pytest.mark.parametrize("fmt", declared_formats())
+def test_declared_formats_match_to_date(fmt):
+    s = pd.Series(DATES, dtype=object)
+    assert list(to_date_column(s, formats=(fmt,))) == [to_date(v) for v in DATES]
+
+
+def test_two_digit_years_are_not_month_first():
+    assert not is_month_first("%m/%d/%y")
+    assert is_month_first("%m/%d/%Y")
+    assert not is_month_first("%d/%m/%Y")
+
+
+def test_contract_rejects_a_two_digit_year_format():
+    data = dict(get_contract().data)
+    data["column_catalog"] = [dict(c, format="%m/%d/%y") if c.get("format") else c for c in data["column_catalog"]]
+    with pytest.raises(ValueError, match="two-digit year"):
+        compile_contract(data)
+
+
+def repeated(values, n=600):
+    return pd.Series([values[i % len(values)] for i in range(n)], dtype=object)
+
+
+@pytest.mark.parametrize("column", [
+    repeated(DATES),  # few distinct values: factorized, guessed format first
+    repeated(["01/15/2025", "1/2/2025", "12/31/2024"]),  # one guessed format for the whole strict pass
+    pd.Series([f"{1 + i % 12}/{1 + i % 28}/{2000 + i % 25}" for i in range(600)], dtype=object),  # near-unique
+    pd.Series(["01/15/2025", pd.NA, "02/01/2025"] * 50, dtype="string"),
+])
+def test_to_date_column_strict_pass_matches_to_date(column):
+    assert list(to_date_column(column)) == [to_date(v) for v in column]
+
+
+def test_numeric_and_string_columns_match_their_scalars():
+    column = repeated(["$1,234", " 12 ", 7, 7.0, True, "", None, "n/a", "abc", 1e6, "-3.5"])
+    assert list(to_numeric_column(column)) == [to_numeric(v) for v in column]
+    assert list(clean_string_column(column)) == [clean_string(v) for v in column]